@@ -0,0 +1,50 @@
+"""
+Compare the size and load time of a large generated configuration saved as
+JSON, YAML and MessagePack (which needs the msgpack package).
+
+    python benchmarks/binary_load.py [--groups 2000] [--keys 50] [--repeat 5]
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from config_manager.storage import load, save
+
+
+def generate(groups: int, keys: int) -> dict:
+    return {
+        f"group_{g}": {
+            f"key_{k}": [k, f"value {g}.{k}", k / 3, k % 2 == 0]
+            for k in range(keys)
+        }
+        for g in range(groups)
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = generate(args.groups, args.keys)
+    with TemporaryDirectory() as directory:
+        for suffix in [".json", ".yaml", ".msgpack"]:
+            path = Path(directory) / f"large{suffix}"
+            try:
+                save(path, data)
+            except NotImplementedError as e:
+                print(f"{suffix:<9} skipped: {e}")
+                continue
+            assert load(path) == data
+            size = path.stat().st_size / 1024 / 1024
+            times = repeat(lambda: load(path), number=1, repeat=args.repeat)
+            best = min(times)
+            print(f"{suffix:<9} {size:6.1f} MiB {best * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
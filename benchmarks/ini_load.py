@@ -0,0 +1,96 @@
+"""
+Compare loading and saving a large INI file with the INI storage backend,
+the regex based parser it replaced and the standard library's configparser.
+
+    python benchmarks/ini_load.py [--groups 1000] [--keys 100] [--repeat 5]
+"""
+
+from argparse import ArgumentParser
+from configparser import RawConfigParser
+from json import dumps as dump_json
+from pathlib import Path
+from re import match, sub
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from config_manager.storage import ini
+
+GROUP_PATTERN = r"^\[(.+)\]$"
+ENTRY_PATTERN = r"^([\S]*)[ ]*=[ ]*(.*)$"
+
+
+def legacy_load(path: Path) -> dict:
+    output = {}
+    current_group = None
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        elif line[0] in ini.COMMENT_PREFIXES:
+            continue
+        elif match(GROUP_PATTERN, line):
+            current_group = sub(GROUP_PATTERN, "\\1", line)
+            if current_group not in output.keys():
+                output[current_group] = {}
+        elif match(ENTRY_PATTERN, line):
+            key = sub(ENTRY_PATTERN, "\\1", line)
+            value = sub(ENTRY_PATTERN, "\\2", line)
+            output[current_group][key] = value
+    return output
+
+
+def legacy_save(path: Path, data: dict) -> None:
+    new_file = ""
+    for group, keys in data.items():
+        new_file += f"[{group}]\n"
+        for key, value in keys.items():
+            if isinstance(value, (list, dict, bool)):
+                new_file += f"{key} = {dump_json(value)}\n"
+                continue
+            new_file += f"{key} = {value}\n"
+        new_file += "\n"
+    path.write_text(new_file)
+
+
+def configparser_load(path: Path) -> dict:
+    parser = RawConfigParser()
+    parser.optionxform = str
+    parser.read(path)
+    return {group: dict(parser[group]) for group in parser.sections()}
+
+
+def generate(groups: int, keys: int) -> dict:
+    return {
+        f"group_{g}": {f"key_{k}": f"value {g}.{k}" for k in range(keys)}
+        for g in range(groups)
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=1000)
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = generate(args.groups, args.keys)
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "large.ini"
+        ini.save(path, data)
+        assert ini.load(path) == legacy_load(path) == configparser_load(path)
+        size = path.stat().st_size / 1024 / 1024
+        print(f"{args.groups * args.keys} entries, {size:.1f} MiB")
+        cases = {
+            "load (ini backend)": lambda: ini.load(path),
+            "load (legacy regex)": lambda: legacy_load(path),
+            "load (configparser)": lambda: configparser_load(path),
+            "save (ini backend)": lambda: ini.save(path, data),
+            "save (legacy concat)": lambda: legacy_save(path, data),
+        }
+        for name, case in cases.items():
+            best = min(repeat(case, number=1, repeat=args.repeat))
+            print(f"{name:<24} {best * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
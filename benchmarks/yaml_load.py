@@ -0,0 +1,63 @@
+"""
+Compare loading and saving a large YAML file with the YAML storage backend
+using libyaml (CSafeLoader/CSafeDumper) and the pure Python implementation.
+
+    python benchmarks/yaml_load.py [--groups 2000] [--repeat 3]
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from yaml import dump
+
+from config_manager.storage import yaml as backend
+
+
+def generate(groups: int) -> dict:
+    return {
+        f"service_{g}": {
+            "host": f"host-{g}.example.com",
+            "port": 8000 + g,
+            "enabled": g % 2 == 0,
+            "ratio": g / 7,
+            "tags": [f"tag-{t}" for t in range(5)],
+            "limits": {"cpu": "500m", "memory": f"{g}Mi"},
+        }
+        for g in range(groups)
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if backend.CSafeLoader is None:
+        print("PyYAML was built without libyaml, only timing pure Python")
+    entries = generate(args.groups)
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "large.yaml"
+        path.write_text(dump(entries))
+        output = Path(directory) / "output.yaml"
+        size = path.stat().st_size / 1024 / 1024
+        print(f"{args.groups} groups, {size:.1f} MiB")
+        results = {}
+        for pure_python in (True, False):
+            backend.pure_python = pure_python
+            label = "pure Python" if pure_python else "libyaml"
+            results[label] = data = backend.load(path)
+            cases = {
+                f"load ({label})": lambda: backend.load(path),
+                f"save ({label})": lambda: backend.save(output, data),
+            }
+            for name, case in cases.items():
+                best = min(repeat(case, number=1, repeat=args.repeat))
+                print(f"{name:<22} {best * 1000:9.1f} ms")
+        assert len({repr(value) for value in results.values()}) == 1
+
+
+if __name__ == "__main__":
+    main()
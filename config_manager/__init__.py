@@ -1,5 +1,17 @@
+from os import environ
 from pathlib import Path
-from .settings import DEFAULT_INTERPOLATION_PATTERN, DEFAULT_PATH_DELIMITER
+from threading import RLock
+from .settings import (
+    DEFAULT_INTERPOLATION_PATTERN,
+    DEFAULT_PATH_DELIMITER,
+    CACHE_DIR_ENVIRONMENT_VARIABLE,
+)
+from .tools.overlay import Overlay
+from .tools.value_cache import ValueCache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .tools.watcher import FileState, FileWatcher
 
 
 def parse_file_parameter(input: Path | str | None) -> Path | None:
@@ -18,6 +30,11 @@ class Config:
     Config is an object to represent the data contained in one or more files.
     The goal is to safely read and write configuration data while allowing for
     secure secret access and robust interpolation.
+
+    A Config can be shared between threads. Its layers are held by an
+    immutable Overlay that readers use without locking; set, load and reloads
+    from watch build a new Overlay under write_lock and publish it with a
+    single assignment.
     """
 
     def __init__(
@@ -27,28 +44,107 @@ class Config:
         deploy_config: Path | str | None = None,
         interpolation_pattern: str = DEFAULT_INTERPOLATION_PATTERN,
         path_delimiter: str = DEFAULT_PATH_DELIMITER,
-        entries: dict = {},
+        entries: dict | None = None,
+        cache_values: bool = False,
+        lazy: bool = False,
+        cache_dir: Path | str | None = None,
+        lock_saves: bool = False,
+        flat_index: bool = False,
     ):
         self.config_file: Path | None = parse_file_parameter(config_file)
         self.default_config: Path | None = parse_file_parameter(default_config)
         self.deploy_config: Path | None = parse_file_parameter(deploy_config)
         self.interpolation_pattern: str = interpolation_pattern
         self.path_delimiter: str = path_delimiter
-        self.entries: dict = entries
-        self.load()
+        self.flat_index: bool = flat_index
+        self.write_lock = RLock()
+        self.loading: bool = False
+        self.overlay = Overlay({"entries": entries or {}})
+        self.value_cache: ValueCache | None = (
+            ValueCache() if cache_values else None
+        )
+        self.cache_dir: Path | None = parse_file_parameter(
+            cache_dir or environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE)
+        )
+        self.lock_saves: bool = lock_saves
+        self.lazy: bool = lazy
+        self.loaded: bool = False
+        self.layers: dict[str, dict] = {}
+        # The state of each file just before load parsed it, and the layers
+        # parsed from them, so watch can start without parsing them again
+        self.file_states: dict[Path, "FileState"] = {}
+        self.file_layers: dict[str, dict] = {}
+        self.watcher: "FileWatcher | None" = None
+        if not lazy:
+            self.load()
+
+    @property
+    def overlay(self) -> Overlay:
+        """
+        The layers of this config: entries given to Config, then the default,
+        main and deploy configuration files, then the overrides made by set.
+        When the config was created with lazy=True, the files are loaded on
+        first access.
+        """
+        if not self.loaded:
+            with self.write_lock:
+                # The loading thread itself gets the layers published so far
+                if not self.loaded and not self.loading:
+                    self.load()
+        return self._overlay
+
+    @overlay.setter
+    def overlay(self, value: Overlay) -> None:
+        if self.flat_index and value.flat is None:
+            value.flatten()
+        self._overlay = value
+
+    @property
+    def entries(self) -> dict:
+        """
+        The merged entries of every configuration file, built on first
+        access. Once built, the same dictionary is read by get, updated by set
+        and written by save, so it can also be changed in place (the cached
+        values of cache_values are not invalidated by that). A reload
+        replaces it.
+        """
+        return self.overlay.merge()
+
+    @entries.setter
+    def entries(self, value: dict) -> None:
+        with self.write_lock:
+            self.overlay = Overlay({"entries": value})
+            if self.value_cache is not None:
+                self.value_cache.clear()
 
     from .methods import (
         get,
+        aget,
         get_str,
+        aget_str,
         get_int,
         get_float,
         get_bool,
         get_dict,
         get_list,
         set,
+        cache_key,
         save,
         load,
+        read_layer,
+        lookup,
+        source_of,
+        watch,
+        stop_watching,
         interpolate,
+        ainterpolate,
+        resolve_reference,
+        aresolve_reference,
+        prefetch,
+        aprefetch,
+        resolve_all,
         interpolate_file,
+        interpolate_files,
+        ainterpolate_file,
         parse_path,
     )
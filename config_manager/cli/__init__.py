@@ -1,8 +1,18 @@
 import click
 from pathlib import Path
-from json import dumps as dump_json
 from config_manager import Config
+from config_manager.storage import load as load_file, save as save_file
+from config_manager.settings import CACHE_DIR_ENVIRONMENT_VARIABLE
 import functools
+import sys
+from re import sub
+from typing import Any
+from time import perf_counter
+
+# Commands import what only they need (asyncio, the socket server, glob...)
+# inside their own bodies to keep start-up fast for one-off shell calls.
+
+DASH = Path("-")
 
 
 def get_config_options(f):
@@ -17,7 +27,7 @@ def get_config_options(f):
             writable=True,
             path_type=Path,
         ),
-        required=True,
+        required=False,
     )
     @click.option(
         "--default-config",
@@ -50,6 +60,11 @@ def get_config_options(f):
     return wrapper
 
 
+def require_config(*files: Path | None) -> None:
+    if not any(files):
+        raise click.UsageError("Missing option '-c' / '--config-file'.")
+
+
 @click.group()
 def cli():
     pass
@@ -57,23 +72,120 @@ def cli():
 
 @cli.command()
 @get_config_options
-@click.argument("path", type=str)
+@click.argument("paths", type=str, nargs=-1)
+@click.option(
+    "--stdin",
+    "read_stdin",
+    is_flag=True,
+    help="Also read paths from stdin, one per line.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["lines", "nul", "json", "shell"]),
+    default="lines",
+    show_default=True,
+    help=(
+        "lines: one value per line; nul: NUL-terminated values; json: an "
+        "object mapping paths to values; shell: KEY=value assignments."
+    ),
+)
+@click.option(
+    "--concurrent",
+    is_flag=True,
+    help="Resolve all paths concurrently (useful for Vault secrets).",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+    help="Query a running 'serve' daemon instead of loading files.",
+)
 def get(
     config_file: Path,
     default_config: Path,
     deploy_config: Path,
-    path: str,
+    paths: tuple[str, ...],
+    read_stdin: bool,
+    output_format: str,
+    concurrent: bool,
+    socket_path: Path | None,
 ):
     """
-    Get a single value from a config file.
+    Get one or more values from a config file. The config is loaded once and
+    reused for every path.
     """
-    config = Config(
-        config_file=config_file,
-        default_config=default_config,
-        deploy_config=deploy_config,
-    )
-    output = config.get_str(path)
-    print(output, end=None)
+    paths = list(paths)
+    if read_stdin:
+        paths.extend(line.strip() for line in sys.stdin if line.strip())
+    if not paths:
+        raise click.UsageError("No paths given")
+    if socket_path:
+        try:
+            from config_manager.server import query
+
+            response = query(socket_path, {"op": "get", "paths": paths})
+            values = response["values"]
+        except (OSError, RuntimeError) as e:
+            raise click.ClickException(str(e)) from e
+    else:
+        require_config(config_file, default_config)
+        config = Config(
+            config_file=config_file,
+            default_config=default_config,
+            deploy_config=deploy_config,
+            lazy=True,
+        )
+        if concurrent:
+            from asyncio import run
+
+            values = run(get_concurrently(config, paths))
+        else:
+            values = [config.get(path) for path in paths]
+    if output_format == "json":
+        from config_manager.tools.codec import dump_json
+
+        print(dump_json(dict(zip(paths, values))))
+        return
+    strings = [format_value(value) for value in values]
+    if output_format == "nul":
+        sys.stdout.write("".join(f"{string}\0" for string in strings))
+    elif output_format == "shell":
+        from shlex import quote
+
+        for path, string in zip(paths, strings):
+            print(f"{shell_variable(path)}={quote(string)}")
+    else:
+        for string in strings:
+            print(string)
+
+
+async def get_concurrently(config: Config, paths: list[str]) -> list[Any]:
+    from asyncio import gather
+
+    return await gather(*(config.aget(path) for path in paths))
+
+
+def format_value(value: Any) -> str:
+    """
+    Format a value the same way Config.get_str does.
+    """
+    if isinstance(value, (dict, list)):
+        from config_manager.tools.codec import dump_json
+
+        return dump_json(value)
+    return str(value)
+
+
+def shell_variable(path: str) -> str:
+    """
+    Turn a config path into a shell variable name, e.g. db/host -> DB_HOST.
+    """
+    name = sub(r"\W", "_", path.strip("/")).upper()
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return name
 
 
 @cli.command()
@@ -91,6 +203,7 @@ def set(
     Add or update a configuration value. If the value does not yet exist, it
     will be created.
     """
+    require_config(config_file)
     config = Config(
         config_file=config_file,
         default_config=default_config,
@@ -102,16 +215,106 @@ def set(
 
 @cli.command()
 @get_config_options
-def export(config_file: Path, default_config: Path, deploy_config: Path):
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write JSON without indentation or spaces.",
+)
+@click.option(
+    "--resolved",
+    is_flag=True,
+    help="Interpolate every value before exporting it.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    show_default=True,
+    help=(
+        "json: one document; jsonl: one [path, value] array per line for "
+        "every value other than a dictionary."
+    ),
+)
+@click.option(
+    "--prefix",
+    type=str,
+    required=False,
+    help="Only export the subtree at this path.",
+)
+@click.option(
+    "--output",
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False,
+        writable=True,
+        allow_dash=True,
+        path_type=Path,
+    ),
+    default=DASH,
+    help="Write to this file instead of stdout.",
+)
+def export(
+    config_file: Path,
+    default_config: Path,
+    deploy_config: Path,
+    compact: bool,
+    resolved: bool,
+    output_format: str,
+    prefix: str | None,
+    output: Path,
+):
     """
-    Export configuration as JSON to stdout.
+    Export configuration as JSON to stdout or a file. The output is encoded
+    and written piece by piece, so it is never held in memory as a whole.
     """
+    require_config(config_file, default_config)
+    from config_manager.tools import get_nested_value
+    from config_manager.tools.codec import iter_json, iter_json_lines
+    from config_manager.tools.files import open_output
+
     config = Config(
         config_file=config_file,
         default_config=default_config,
         deploy_config=deploy_config,
     )
-    print(dump_json(config.entries, indent=2))
+    path = config.parse_path(prefix) if prefix else ()
+    try:
+        if not resolved:
+            value = config.lookup(path)
+        elif path:
+            value = get_nested_value(path, config.resolve_all())
+        else:
+            value = config.resolve_all()
+    except (KeyError, IndexError, ValueError) as e:
+        m = f"No value at {prefix}"
+        raise click.BadParameter(m, param_hint="--prefix") from e
+    if output_format == "jsonl":
+        chunks = iter_json_lines(value, tuple(path), config.path_delimiter)
+    else:
+        chunks = iter_json(value, compact)
+    with open_output(sys.stdout if output == DASH else output) as stream:
+        stream.writelines(chunks)
+        if output_format == "json":
+            stream.write("\n")
+
+
+@cli.command()
+@click.argument(
+    "source",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.argument(
+    "destination",
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+def convert(source: Path, destination: Path):
+    """
+    Convert a configuration file to another format, chosen by the file
+    suffixes, e.g. to or from the binary .msgpack format. Variables are
+    copied as they are, not interpolated.
+    """
+    save_file(destination, load_file(source))
 
 
 @cli.command()
@@ -124,9 +327,10 @@ def export(config_file: Path, default_config: Path, deploy_config: Path):
         dir_okay=False,
         readable=True,
         writable=True,
+        allow_dash=True,
         path_type=Path,
     ),
-    required=True,
+    multiple=True,
 )
 @click.option(
     "--output",
@@ -134,27 +338,212 @@ def export(config_file: Path, default_config: Path, deploy_config: Path):
         file_okay=True,
         dir_okay=False,
         writable=True,
+        allow_dash=True,
+        path_type=Path,
+    ),
+    multiple=True,
+)
+@click.option(
+    "--glob",
+    "patterns",
+    type=str,
+    multiple=True,
+    help="Render every file matching this glob pattern.",
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        path_type=Path,
+    ),
+    required=False,
+    help="Write files matched by --glob here instead of in-place.",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
         path_type=Path,
     ),
     required=False,
+    help="A JSON, YAML or INI file mapping templates to outputs.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    required=False,
+    help="Number of templates to render at once.",
 )
 def build(
     config_file: Path,
     default_config: Path,
     deploy_config: Path,
-    template: Path,
-    output: Path | None = None,
+    template: tuple[Path, ...],
+    output: tuple[Path, ...],
+    patterns: tuple[str, ...],
+    output_dir: Path | None,
+    manifest: Path | None,
+    workers: int | None,
 ):
     """
-    Fill a template file with values from config. If output parameter is not
-    used, the template file will be edited in-place. Variables in the template
-    file can be specified using the following formats: ${plugin:path/to/value}
+    Fill template files with values from config. If the output parameter is
+    not used, each template file will be edited in-place. Variables in the
+    template file can be specified using the following formats:
+    ${plugin:path/to/value}
 
     For example: ${var:path/to/value} or ${vault:path/to/secret}
+
+    --template may be given several times, each paired with the --output in
+    the same position. Templates can also be selected with --glob or listed
+    in a --manifest file; relative paths in a manifest are relative to it.
+    All templates are rendered from one loaded config using a thread pool,
+    and a timing summary is printed to stderr when there is more than one.
+
+    Use - as the template or output to read from stdin or write to stdout. A
+    template read from stdin is written to stdout unless an output is given.
     """
+    from glob import glob
+    from config_manager.tools.files import unique_outputs
+
+    require_config(config_file, default_config)
+    if output and len(output) != len(template):
+        m = "--output must be given once for every --template"
+        raise click.BadParameter(m, param_hint="--output")
+    files = list(zip(template, output or [None] * len(template)))
+    for pattern in patterns:
+        for match in map(Path, sorted(glob(pattern, recursive=True))):
+            if match.is_file():
+                destination = output_dir / match.name if output_dir else None
+                files.append((match, destination))
+    if manifest:
+        files.extend(load_manifest(manifest))
+    if not files:
+        raise click.UsageError("No templates given")
+    if not any(DASH in pair for pair in files):
+        try:
+            files = unique_outputs(files)
+        except ValueError as error:
+            raise click.UsageError(str(error))
     config = Config(
         config_file=config_file,
         default_config=default_config,
         deploy_config=deploy_config,
+        lazy=True,
+    )
+    if any(DASH in pair for pair in files):
+        if len(files) != 1:
+            raise click.UsageError("- can only be used with a single template")
+        template_file, destination_file = files[0]
+        if template_file == DASH:
+            template_file = sys.stdin
+            if destination_file is None:
+                destination_file = DASH
+        if destination_file == DASH:
+            destination_file = sys.stdout
+        config.interpolate_file(
+            template_file=template_file,
+            destination_file=destination_file,
+        )
+        return
+    start = perf_counter()
+    timings = config.interpolate_files(files, max_workers=workers)
+    if len(files) > 1:
+        for (template_file, destination_file), seconds in zip(files, timings):
+            target = destination_file or template_file
+            click.echo(
+                f"{seconds * 1000:10.1f} ms  {template_file} -> {target}",
+                err=True,
+            )
+        total = perf_counter() - start
+        click.echo(
+            f"{total * 1000:10.1f} ms  total ({len(files)} templates)",
+            err=True,
+        )
+
+
+def load_manifest(manifest: Path) -> list[tuple[Path, Path | None]]:
+    """
+    Read template/output pairs from a manifest. The manifest maps template
+    paths to output paths, either at the top level or under a templates key.
+    An empty output renders the template in-place.
+    """
+    entries = load_file(manifest)
+    entries = entries.get("templates", entries)
+    output = []
+    for template, destination in entries.items():
+        template_file = manifest.parent / template
+        destination_file = (
+            manifest.parent / destination if destination else None
+        )
+        output.append((template_file, destination_file))
+    return output
+
+
+@cli.command()
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    envvar=CACHE_DIR_ENVIRONMENT_VARIABLE,
+    required=True,
+    help=f"Defaults to ${CACHE_DIR_ENVIRONMENT_VARIABLE}.",
+)
+def clear_cache(cache_dir: Path):
+    """
+    Delete the parsed configuration cache. Configs are cached on disk when a
+    cache directory is given to Config or set in the environment.
+    """
+    from config_manager.tools.disk_cache import clear_cache as clear_cache_dir
+
+    count = clear_cache_dir(cache_dir)
+    click.echo(f"Removed {count} cached configuration(s) from {cache_dir}")
+
+
+@cli.command()
+@get_config_options
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=True,
+    help="Path of the Unix domain socket to listen on.",
+)
+@click.option(
+    "--build-root",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=Path("."),
+    show_default=True,
+    help="Only build templates and outputs inside this directory.",
+)
+def serve(
+    config_file: Path,
+    default_config: Path,
+    deploy_config: Path,
+    socket_path: Path,
+    build_root: Path,
+):
+    """
+    Load a config once and answer get, export and build requests over a Unix
+    domain socket until interrupted. Query it with: get --socket PATH ...
+
+    The config is reloaded whenever one of its files changes. Requests and
+    responses are single lines of JSON, e.g. {"op": "get", "path": "a/b"}.
+    The socket is only accessible to the user running the server.
+    """
+    require_config(config_file, default_config)
+    from config_manager.server import serve as serve_config
+
+    serve_config(
+        socket_path,
+        lambda: Config(
+            config_file=config_file,
+            default_config=default_config,
+            deploy_config=deploy_config,
+            cache_values=True,
+        ),
+        build_root,
     )
-    config.interpolate_file(template_file=template, destination_file=output)
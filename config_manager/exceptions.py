@@ -2,3 +2,10 @@ class NotConfiguredError(Exception):
     """
     Raise this exception if configuration file has not been customized.
     """
+
+
+class InterpolationCycleError(Exception):
+    """
+    Raise this exception if values reference each other in a cycle, so they
+    can never be fully interpolated.
+    """
@@ -1,55 +1,184 @@
 from __future__ import annotations
 
-from re import search, finditer, sub
-from typing import Any, TYPE_CHECKING
+from itertools import chain
+from time import perf_counter
+from typing import Any, Callable, IO, Iterable, TYPE_CHECKING
 from pathlib import Path
-from json import dumps as dump_json
 
 if TYPE_CHECKING:
     from . import Config
 
-from .tools import get_nested_value, set_nested_value, merge_dictionaries
+from .tools import (
+    get_nested_value,
+    iter_strings,
+    iter_string_paths,
+    merge_dictionaries,
+    replace_values,
+    set_nested_value,
+    split_path,
+)
+from .tools.files import open_output, unique_outputs
+from .tools.overlay import MISSING, Overlay, find_in_layer
+from .tools.watcher import file_state
+from .tools.template import (
+    Template,
+    compile_file,
+    compile_template,
+    group_references,
+    parse_template,
+    collect_references,
+)
 from .storage import save as save_to_file, load as load_file
-from .plugins import plugin_interpolate
+from .plugins import (
+    plugin_interpolate,
+    plugin_ainterpolate,
+    plugin_prefetch,
+    plugin_aprefetch,
+)
 from .exceptions import NotConfiguredError
-from .settings import DEFAULT_INTERPOLATION_PATTERN
+from .settings import CACHEABLE_PLUGINS
 
 
 def parse_path(self: Config, path: str | list[str]) -> list[str]:
-    if isinstance(path, list):
-        return path
-    output = path.strip(self.path_delimiter).split(self.path_delimiter)
-    return output
+    """
+    Split a path string into a list of levels; lists of levels are returned
+    as they are. Strings are split once and cached by split_path.
+    """
+    if isinstance(path, str):
+        return list(split_path(path, self.path_delimiter))
+    return path
+
+
+def cache_key(self: Config, path: str | list) -> tuple[str, ...]:
+    """
+    Normalize a path into the tuple used as a key by the value cache.
+    """
+    if isinstance(path, str):
+        return split_path(path, self.path_delimiter)
+    return tuple(str(level) for level in path)
 
 
-def save(self: Config) -> None:
+def save(self: Config) -> bool:
     """
-    Write configurations to a configuration file.
+    Write configurations to a configuration file. Nothing is written when the
+    file already holds the same content; returns whether it was written.
     """
     if self.config_file is None:
         m = "Attribute config_file must be set to save to disk"
         raise AttributeError(m)
-    save_to_file(path=self.config_file, data=self.entries)
+    return save_to_file(
+        path=self.config_file,
+        data=self.overlay.merge(keep=False),
+        lock=self.lock_saves,
+    )
 
 
 def load(self: Config):
+    """
+    Read the default, main and deploy configuration files into the layers of
+    a new overlay. Other threads keep reading the previous overlay until the
+    new one is published.
+    """
+    with self.write_lock:
+        self.loading = True
+        if self.value_cache is not None:
+            self.value_cache.clear()
+        files = {
+            name: getattr(self, name)
+            for name in ("default_config", "config_file", "deploy_config")
+            if getattr(self, name)
+        }
+        # Files a lazy lookup already parsed keep the state read_layer saw
+        self.file_states = {
+            path: (
+                self.file_states.get(path)
+                if name in self.layers
+                else file_state(path)
+            )
+            for name, path in files.items()
+        }
+        try:
+            if self.cache_dir is None or not load_cached_layers(self):
+                merge_layers(self)
+        except BaseException:
+            self.loaded = False
+            raise
+        else:
+            self.loaded = True
+            self.file_layers = {
+                name: self._overlay.layers[name]
+                for name, path in files.items()
+                if self.file_states[path] is not None
+                and name in self._overlay.layers
+            }
+        finally:
+            self.loading = False
+            self.layers.clear()
+
+
+def load_cached_layers(self: Config) -> bool:
+    """
+    Load the layers from the on-disk cache in cache_dir when every file still
+    matches its fingerprint. Otherwise merge the files as usual and refresh
+    the cache. Returns False if the cache cannot be used for this config.
+    """
+    if self._overlay.layers.get("entries") or (
+        self.config_file
+        and self.default_config
+        and not self.config_file.exists()
+    ):
+        return False
+    from .tools.disk_cache import read_cache, write_cache, fingerprints
+
+    files = {
+        name: getattr(self, name)
+        for name in ("default_config", "config_file", "deploy_config")
+        if getattr(self, name)
+    }
+    cached = read_cache(self.cache_dir, files)
+    if cached is not None:
+        self.overlay = Overlay(cached)
+        return True
+    before = fingerprints(files)
+    merge_layers(self)
+    after = fingerprints(files)
+    saved = "deploy_config" in files and "config_file" in files
+    if all(
+        old == new or (saved and old[0] == "config_file")
+        for old, new in zip(before, after)
+    ):
+        write_cache(self.cache_dir, files, after, self.overlay.layers)
+    return True
+
+
+def merge_layers(self: Config):
+    """
+    Stack the configuration files on top of any entries given to Config, from
+    default (lowest precedence) through main to deploy (highest). set writes
+    to the main layer, or to the entries when there is no main file.
+    """
     config_untouched = False
+    base = self._overlay.layers.get("entries", {})
+    layers = {"entries": base} if base or not self.config_file else {}
     if self.default_config:
-        merge_dictionaries(load_file(self.default_config), self.entries)
+        layers["default_config"] = self.read_layer("default_config")
     if (
         self.default_config
         and self.config_file
         and not self.config_file.exists()
     ):
-        self.save()
+        self.overlay = Overlay(layers)
+        save_loaded(self)
         config_untouched = True
+        layers["config_file"] = {}
     elif self.config_file:
-        merge_dictionaries(load_file(self.config_file), self.entries)
+        layers["config_file"] = self.read_layer("config_file")
     if self.deploy_config:
-        merge_dictionaries(load_file(self.deploy_config), self.entries)
+        layers["deploy_config"] = self.read_layer("deploy_config")
         config_untouched = False
+    self.overlay = Overlay(layers)
     if self.deploy_config and self.config_file:
-        self.save()
+        save_loaded(self)
     if config_untouched:
         m = (
             "This application has not yet been configured. "
@@ -59,6 +188,152 @@ def load(self: Config):
         raise NotConfiguredError(m)
 
 
+def save_loaded(self: Config) -> None:
+    """
+    Save config_file while loading, recording its new state so that a
+    watcher does not take the write for a change.
+    """
+    if self.save():
+        self.file_states[self.config_file] = file_state(self.config_file)
+
+
+def read_layer(self: Config, name: str) -> dict:
+    """
+    Parse one of the configuration files (default_config, config_file or
+    deploy_config), keeping the result until the layers are merged. The
+    state of the file just before it is parsed is recorded for watch.
+    """
+    layer = self.layers.get(name)
+    if layer is None:
+        path = getattr(self, name)
+        self.file_states[path] = file_state(path)
+        layer = self.layers[name] = load_file(path)
+    return layer
+
+
+def watch(
+    self: Config,
+    on_change: Callable[[set[Path]], None] | None = None,
+    debounce: float = 0.2,
+    interval: float = 1.0,
+) -> None:
+    """
+    Keep entries up to date with the configuration files from a background
+    thread (see FileWatcher). When files change only they are parsed again,
+    and a new overlay of the layers replaces the old one in a single
+    assignment so readers see either the old or the new state. Files are
+    never written while watching, and values changed with set are replaced
+    on the next reload. If a changed file cannot be parsed the current
+    layers are kept until it changes again.
+    """
+    from .tools.watcher import FileWatcher
+
+    files = {
+        getattr(self, name): name
+        for name in ("default_config", "config_file", "deploy_config")
+        if getattr(self, name)
+    }
+    layers: dict[str, dict] = {}
+
+    def reload(changed: set[Path]) -> None:
+        updated = dict(layers)
+        try:
+            for path in changed:
+                if path.exists():
+                    updated[files[path]] = load_file(path)
+                else:
+                    updated.pop(files[path], None)
+        except Exception:
+            return
+        with self.write_lock:
+            base = self._overlay.layers.get("entries")
+            overlay = {} if base is None else {"entries": base}
+            for name in ("default_config", "config_file", "deploy_config"):
+                if name in updated:
+                    overlay[name] = updated[name]
+                elif name == "config_file" and self.config_file:
+                    overlay[name] = {}
+            layers.clear()
+            layers.update(updated)
+            self.overlay = Overlay(overlay)
+            if self.value_cache is not None:
+                self.value_cache.clear()
+        if on_change is not None:
+            on_change(changed)
+
+    with self.write_lock:
+        if self.watcher is not None:
+            return
+        # Load a lazy config first. The layers load parsed are reused, and
+        # the watcher starts from the state the files were in just before
+        # they were parsed, so changes made since are picked up right away.
+        self.overlay
+        states = {}
+        for path, name in files.items():
+            if path in self.file_states:
+                states[path] = self.file_states[path]
+                if name in self.file_layers:
+                    layers[name] = self.file_layers[name]
+            else:
+                # A file set after loading is parsed here, after its state
+                # is recorded
+                states[path] = file_state(path)
+                if path.exists():
+                    layers[name] = load_file(path)
+        self.watcher = FileWatcher(
+            list(files), reload, debounce, interval, states
+        )
+        self.watcher.start()
+
+
+def stop_watching(self: Config) -> None:
+    # Stop outside the lock, a reload in progress may be waiting for it
+    with self.write_lock:
+        watcher, self.watcher = self.watcher, None
+    if watcher is not None:
+        watcher.stop()
+
+
+def lookup(self: Config, path: list) -> Any:
+    """
+    Get the raw value at path. Before a lazy config has been loaded, the
+    layers are searched from the top down and only parsed when needed; values
+    that have to be merged across layers (dictionaries) load everything. With
+    an on-disk cache, loading everything from the cache is cheaper still.
+    """
+    if self.loaded or self.cache_dir is not None or (
+        self.default_config
+        and self.config_file
+        and not self.config_file.exists()
+    ):
+        return self.overlay.find(path)
+    sources = [
+        name
+        for name in ("deploy_config", "config_file", "default_config")
+        if getattr(self, name)
+    ]
+    for source in sources:
+        value = find_in_layer(path, self.read_layer(source))
+        if value is not MISSING:
+            break
+    else:
+        value = find_in_layer(path, self._overlay.layers.get("entries", {}))
+    if value is MISSING:
+        raise KeyError(path)
+    if isinstance(value, dict):
+        return self.overlay.find(path)
+    return value
+
+
+def source_of(self: Config, path: str | list) -> str:
+    """
+    Name the layer the value at path comes from: "deploy_config",
+    "config_file", "default_config" or "entries" (given to Config or set
+    without a config_file).
+    """
+    return self.overlay.source_of(self.parse_path(path))
+
+
 def set(
     self: Config,
     path: str | list,
@@ -68,30 +343,100 @@ def set(
     """
     Sets a value by path, parsing arrays and objects as needed. Optionally can
     create path in entries if it does not exist.
+
+    The value is written to an overrides layer above every file, including
+    deploy_config, so get returns it and save writes it to config_file.
+    Overrides last until the files are loaded again.
+
+    Writers are serialized by write_lock; readers in other threads see either
+    the overlay before or after the change.
     """
-    set_nested_value(
-        path=self.parse_path(path),
-        value=value,
-        input=self.entries,
-        create_path=create_path,
-    )
+    with self.write_lock:
+        overlay = self.overlay
+        path = self.parse_path(path)
+        merged = overlay.merged
+        if merged is not None and not create_path and len(path) > 1:
+            # The parent may only exist in entries changed in place
+            get_nested_value(path[:-1], merged)
+            create_path = True
+        updated = overlay.set("overrides", path, value, create_path)
+        if merged is not None:
+            # Keep entries that were handed out up to date, as set used to,
+            # merging dictionaries the way the layers do
+            node = updated.find(path) if isinstance(value, dict) else value
+            try:
+                current = get_nested_value(path, merged)
+            except (KeyError, IndexError, ValueError, TypeError):
+                current = None
+            if isinstance(node, dict) and isinstance(current, dict):
+                merge_dictionaries(value, current)
+            else:
+                set_nested_value(path, node, merged, True)
+            updated.merged = merged
+        self.overlay = updated
+        if self.value_cache is not None:
+            self.value_cache.invalidate(self.cache_key(path))
 
 
 def get(self: Config, path: list | str):
     """
     Gets a value by path, interpolating variables and secrets. When using this
     function, there are no guarantees about the type.
+
+    If the config was created with cache_values=True, resolved values are
+    cached until a path they depend on is set.
+    """
+    if self.value_cache is not None:
+        return self.value_cache.get(
+            self.cache_key(path), lambda: resolve_value(self, path)
+        )
+    return resolve_value(self, path)
+
+
+def resolve_value(self: Config, path: list | str):
+    value = self.lookup(self.parse_path(path))
+    if isinstance(value, str):
+        template = compile_template(self.interpolation_pattern, value)
+        if template.references:
+            value = template.render(self.resolve_reference)
+    return value
+
+
+async def aget(self: Config, path: list | str):
     """
-    value = get_nested_value(path=self.parse_path(path), input=self.entries)
-    if isinstance(value, str) and search(self.interpolation_pattern, value):
-        value = self.interpolate(value)
+    Asynchronous version of get. References inside the value are resolved
+    concurrently through the plugins' async hooks. Cached values are used when
+    available, but values resolved asynchronously are not cached.
+    """
+    if self.value_cache is not None:
+        cached = self.value_cache.values.get(self.cache_key(path))
+        if cached is not None:
+            return cached[0]
+    value = self.lookup(self.parse_path(path))
+    if isinstance(value, str):
+        template = compile_template(self.interpolation_pattern, value)
+        if template.references:
+            value = await template.arender(self.aresolve_reference)
     return value
 
 
-def get_str(self: Config, path: list | str) -> str:
+def get_str(self: Config, path: list | str, compact: bool = False) -> str:
     value = self.get(self.parse_path(path))
     if isinstance(value, (dict, list)):
-        return dump_json(value, indent=2)
+        from .tools.codec import dump_json
+
+        return dump_json(value, compact)
+    return str(value)
+
+
+async def aget_str(
+    self: Config, path: list | str, compact: bool = False
+) -> str:
+    value = await self.aget(self.parse_path(path))
+    if isinstance(value, (dict, list)):
+        from .tools.codec import dump_json
+
+        return dump_json(value, compact)
     return str(value)
 
 
@@ -158,41 +503,289 @@ def get_list(self: Config, path: list | str) -> list:
     return value
 
 
+def resolve_reference(self: Config, plugin: str, value: str) -> str:
+    """
+    Resolve a single ${plugin:value} reference through its plugin.
+    """
+    if self.value_cache is not None and plugin not in CACHEABLE_PLUGINS:
+        self.value_cache.mark_volatile()
+    return plugin_interpolate(self, plugin, value)
+
+
+async def aresolve_reference(self: Config, plugin: str, value: str) -> str:
+    """
+    Asynchronously resolve a single ${plugin:value} reference.
+    """
+    return await plugin_ainterpolate(self, plugin, value)
+
+
 def interpolate(
     self: Config,
     value: str,
-    interpolation_pattern: str = DEFAULT_INTERPOLATION_PATTERN,
+    interpolation_pattern: str | None = None,
 ) -> str:
     """
     Takes a value and interpolates the references to other fields and
     functions, returning a fully rendered value.
     """
-    new_value = value
-    for entry in finditer(interpolation_pattern, value):
-        start = entry.start()
-        end = entry.end()
-        interpolation_text = value[start:end]
-        plugin = sub(interpolation_pattern, "\\1", interpolation_text)
-        initial_value = sub(interpolation_pattern, "\\2", interpolation_text)
-        result = plugin_interpolate(self, plugin, initial_value)
-        new_value = new_value.replace(interpolation_text, result)
-    return new_value
+    if interpolation_pattern is None:
+        interpolation_pattern = self.interpolation_pattern
+    template = compile_template(interpolation_pattern, value)
+    return template.render(self.resolve_reference)
+
+
+async def ainterpolate(
+    self: Config,
+    value: str,
+    interpolation_pattern: str | None = None,
+) -> str:
+    """
+    Asynchronous version of interpolate; distinct references are resolved
+    concurrently.
+    """
+    if interpolation_pattern is None:
+        interpolation_pattern = self.interpolation_pattern
+    template = compile_template(interpolation_pattern, value)
+    return await template.arender(self.aresolve_reference)
+
+
+def prefetch(
+    self: Config,
+    values: Iterable[str] | None = None,
+    cache_templates: bool = True,
+) -> None:
+    """
+    Scan values (or every string in the loaded entries) for references and let
+    each plugin load what they need in one batch, so later lookups resolve
+    from memory. The Vault plugin fetches each secret path only once.
+    """
+    if values is None:
+        values = iter_strings(self.overlay.merge(keep=False))
+    prefetch_references(
+        self,
+        collect_references(
+            self.interpolation_pattern, values, cache=cache_templates
+        ),
+    )
+
+
+async def aprefetch(
+    self: Config,
+    values: Iterable[str] | None = None,
+    cache_templates: bool = True,
+) -> None:
+    """
+    Asynchronous version of prefetch; plugins are prefetched concurrently.
+    """
+    if values is None:
+        values = iter_strings(self.overlay.merge(keep=False))
+    await aprefetch_references(
+        self,
+        collect_references(
+            self.interpolation_pattern, values, cache=cache_templates
+        ),
+    )
+
+
+def resolve_all(self: Config) -> dict:
+    """
+    Return a copy of the merged entries with every string fully interpolated.
+    The ${var:...} references between values are built into a dependency
+    graph once and resolved in topological order, so each value is rendered
+    exactly once and references to it reuse the result. Every other plugin
+    is prefetched in one batch first.
+
+    Raises InterpolationCycleError, naming the paths involved, if values
+    reference each other in a cycle.
+    """
+    from .plugins.var import parse_reference
+    from .tools.graph import topological_order
+
+    entries = self.overlay.merge(keep=False)
+    templates = {}
+    for path, value in iter_string_paths(entries):
+        template = compile_template(self.interpolation_pattern, value)
+        if template.references:
+            templates[path] = template
+    dependencies: dict[tuple, list[tuple]] = {}
+    external: dict[str, dict[str, None]] = {}
+    for path, template in templates.items():
+        dependencies[path] = []
+        for plugin, argument in template.references:
+            if plugin != "var":
+                external.setdefault(plugin, {})[argument] = None
+                continue
+            target = tuple(parse_reference(argument))
+            if target in templates:
+                dependencies[path].append(target)
+    order = topological_order(dependencies)
+    prefetch_references(
+        self,
+        {plugin: list(arguments) for plugin, arguments in external.items()},
+    )
+    resolved: dict[tuple, str] = {}
+
+    def resolve(plugin: str, argument: str) -> str:
+        if plugin == "var":
+            target = tuple(parse_reference(argument))
+            if target in resolved:
+                return resolved[target]
+        return self.resolve_reference(plugin, argument)
+
+    for path in order:
+        resolved[path] = templates[path].render(resolve)
+    return replace_values(entries, resolved)
+
+
+def prefetch_references(self: Config, references: dict[str, list[str]]):
+    for plugin, arguments in references.items():
+        plugin_prefetch(self, plugin, arguments)
+
+
+async def aprefetch_references(
+    self: Config,
+    references: dict[str, list[str]],
+) -> None:
+    from asyncio import gather
+
+    await gather(
+        *(
+            plugin_aprefetch(self, plugin, arguments)
+            for plugin, arguments in references.items()
+        )
+    )
 
 
 def interpolate_file(
     self: Config,
-    template_file: Path,
-    destination_file: Path | None = None,
+    template_file: Path | IO[str],
+    destination_file: Path | IO[str] | None = None,
+    prefetch: bool = True,
 ) -> None:
     """
     Takes a given template file and searches for all matches to the
     interpolation pattern. Interpolates all patterns found with loaded config.
 
     Changes are either written to template_file or destination_file if provided.
+    Either may also be an open text stream such as stdin or stdout. A template
+    path is read and compiled once (see compile_file), its references are
+    prefetched, and the output is written through a temporary file that
+    replaces the destination once complete. Streams are rendered line by line
+    as they are read.
+    """
+    destination_file = get_destination(template_file, destination_file)
+    if isinstance(template_file, Path):
+        templates: Iterable[Template] = compile_file(
+            self.interpolation_pattern, template_file
+        )
+        if prefetch:
+            prefetch_references(self, group_references(templates))
+    else:
+        templates = (
+            parse_template(self.interpolation_pattern, line)
+            for line in template_file
+        )
+    write_templates(self, templates, destination_file)
+
+
+def write_templates(
+    self: Config,
+    templates: Iterable[Template],
+    destination_file: Path | IO[str],
+) -> None:
+    with open_output(destination_file) as destination:
+        for template in templates:
+            destination.write(template.render(self.resolve_reference))
+
+
+def interpolate_files(
+    self: Config,
+    files: Iterable[tuple[Path, Path | None]],
+    max_workers: int | None = None,
+) -> list[float]:
     """
-    new_contents = ""
-    if destination_file is None:
-        destination_file = template_file
-    for line in template_file.read_text().splitlines():
-        new_contents += self.interpolate(line) + "\n"
-    destination_file.write_text(new_contents)
+    Render many (template_file, destination_file) pairs from this config
+    using a thread pool. Every template is compiled once and their references
+    are prefetched in one batch first, so secrets shared between templates
+    are only fetched once. Repeated pairs are rendered once, and colliding
+    outputs raise ValueError before anything is written (see unique_outputs).
+
+    Returns the time in seconds each unique pair took to render, in order.
+    """
+    files = unique_outputs(files)
+    compiled = [
+        compile_file(self.interpolation_pattern, template_file)
+        for template_file, _ in files
+    ]
+    prefetch_references(
+        self, group_references(chain.from_iterable(compiled))
+    )
+
+    def render(
+        templates: tuple[Template, ...],
+        template_file: Path,
+        destination_file: Path | None,
+    ) -> float:
+        start = perf_counter()
+        write_templates(self, templates, destination_file or template_file)
+        return perf_counter() - start
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                lambda job: render(job[0], *job[1]), zip(compiled, files)
+            )
+        )
+
+
+async def ainterpolate_file(
+    self: Config,
+    template_file: Path | IO[str],
+    destination_file: Path | IO[str] | None = None,
+) -> None:
+    """
+    Asynchronous version of interpolate_file. When the template is a path,
+    it is compiled once and every distinct reference in it is resolved
+    concurrently before the output is written; streams are resolved
+    concurrently line by line.
+    """
+    from asyncio import gather
+
+    destination_file = get_destination(template_file, destination_file)
+    if not isinstance(template_file, Path):
+        with open_output(destination_file) as destination:
+            for line in template_file:
+                template = parse_template(self.interpolation_pattern, line)
+                destination.write(
+                    await template.arender(self.aresolve_reference)
+                )
+        return
+    templates = compile_file(self.interpolation_pattern, template_file)
+    references = group_references(templates)
+    await aprefetch_references(self, references)
+    unique = [
+        (plugin, argument)
+        for plugin, arguments in references.items()
+        for argument in arguments
+    ]
+    values = await gather(
+        *(self.aresolve_reference(*reference) for reference in unique)
+    )
+    results = dict(zip(unique, values))
+    with open_output(destination_file) as destination:
+        for template in templates:
+            destination.write(template.join(results))
+
+
+def get_destination(
+    template_file: Path | IO[str],
+    destination_file: Path | IO[str] | None,
+) -> Path | IO[str]:
+    if destination_file is not None:
+        return destination_file
+    if not isinstance(template_file, Path):
+        m = "destination_file is required when template_file is a stream"
+        raise ValueError(m)
+    return template_file
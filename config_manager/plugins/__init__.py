@@ -1,13 +1,95 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
 from importlib import import_module
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from .. import Config
 
+ENTRY_POINT_GROUP = "config_manager.plugins"
+plugins: dict[str, Any] = {}
+
+
+def register_plugin(name: str, plugin: Any) -> None:
+    """
+    Make plugin available to interpolation patterns as name. plugin is any
+    object (usually a module) with an interpolate(config, value) function and
+    optionally ainterpolate, prefetch and aprefetch hooks, or just a function
+    used as interpolate. Registered plugins take precedence over the built-in
+    ones.
+    """
+    if callable(plugin) and not hasattr(plugin, "interpolate"):
+        plugin = SimpleNamespace(interpolate=plugin)
+    plugins[name] = plugin
+
+
+def find_entry_point(name: str) -> Any | None:
+    """
+    Look up a plugin installed by another package under the
+    config_manager.plugins entry point group.
+    """
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP, name=name):
+        return entry_point.load()
+    return None
+
+
+def get_plugin(name: str) -> Any:
+    """
+    Return the plugin for name, resolving it only the first time it is used.
+    """
+    plugin = plugins.get(name)
+    if plugin is not None:
+        return plugin
+    module_name = f"config_manager.plugins.{name}"
+    try:
+        plugin = import_module(module_name)
+    except ModuleNotFoundError as e:
+        # Only a missing plugin module falls through to entry points; a
+        # plugin that is missing one of its own dependencies is an error
+        if e.name != module_name:
+            raise
+        plugin = find_entry_point(name)
+    if plugin is None:
+        raise NotImplementedError(f"No interpolation plugin named {name}.")
+    register_plugin(name, plugin)
+    return plugin
+
 
 def plugin_interpolate(self: Config, plugin: str, value: str) -> str:
-    target_module = import_module(f".{plugin}", "config_manager.plugins")
-    output = target_module.interpolate(self, value)
+    output = get_plugin(plugin).interpolate(self, value)
     return output
+
+
+async def plugin_ainterpolate(self: Config, plugin: str, value: str) -> str:
+    """
+    Await a plugin's ainterpolate hook, falling back to its synchronous
+    interpolate for plugins that do not provide one.
+    """
+    target = get_plugin(plugin)
+    if hasattr(target, "ainterpolate"):
+        return await target.ainterpolate(self, value)
+    return target.interpolate(self, value)
+
+
+def plugin_prefetch(self: Config, plugin: str, values: list[str]) -> None:
+    """
+    Let a plugin load everything it needs for values in one batch, if it
+    provides a prefetch hook.
+    """
+    target = get_plugin(plugin)
+    if hasattr(target, "prefetch"):
+        target.prefetch(self, values)
+
+
+async def plugin_aprefetch(self: Config, plugin: str, values: list[str]):
+    """
+    Asynchronous version of plugin_prefetch.
+    """
+    target = get_plugin(plugin)
+    if hasattr(target, "aprefetch"):
+        await target.aprefetch(self, values)
+    elif hasattr(target, "prefetch"):
+        target.prefetch(self, values)
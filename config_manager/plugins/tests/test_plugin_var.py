@@ -1,3 +1,4 @@
+from asyncio import run
 from config_manager import Config
 from pytest import raises
 
@@ -26,3 +27,16 @@ def test_bad_var_lookup():
     )
     with raises(KeyError):
         config.get(["bad_lookup_value"])
+
+
+def test_async_var_lookup():
+    config = Config(
+        entries={
+            "database": {"host": "db", "port": 5432},
+            "url": "${var:database/host}:${var:database/port}",
+        }
+    )
+    assert run(config.aget_str("url")) == "db:5432"
+    assert run(config.ainterpolate("postgres://${var:url}")) == (
+        "postgres://db:5432"
+    )
@@ -1,6 +1,22 @@
+from asyncio import gather, run
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from time import sleep
 from pytest import raises
 from config_manager import Config
+from httpx import MockTransport, Request, Response
+from config_manager.plugins.vault import (
+    SecretCache,
+    VaultSession,
+    aget_secret,
+    aget_token,
+    get_secret,
+    get_session,
+    get_token,
+    invalidate,
+    refresh,
+    sessions,
+)
 
 CWD = Path(__file__).parent
 DATA_DIRECTORY = CWD / "data"
@@ -21,3 +37,280 @@ def test_vault_not_configured():
     config.set(["my_secret"], "${vault:/path/to/secret}", create_path=True)
     with raises(KeyError):
         config.get(["my_secret"])
+
+
+def test_secret_cache_lru():
+    cache = SecretCache(max_size=2, ttl=60)
+    cache.put("kv/data/app", "a", 1)
+    cache.put("kv/data/app", "b", 2)
+    assert cache.get("kv/data/app", "a") == (True, 1)
+    cache.put("kv/data/app", "c", 3)
+    assert cache.get("kv/data/app", "b") == (False, None)
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 1, "evictions": 1}
+    cache.invalidate("kv/data/app")
+    assert len(cache) == 0
+
+
+def test_secret_cache_expiry():
+    cache = SecretCache(ttl=60)
+    cache.put("kv/data/app", "leased", "value", lease_duration=0.01)
+    cache.put("kv/data/app", "unleased", "value")
+    sleep(0.02)
+    assert ("kv/data/app", "leased") not in cache
+    assert ("kv/data/app", "unleased") in cache
+
+
+def test_vault_cached_secret():
+    config = Config(
+        entries={
+            "vault": {
+                "address": "https://vault.invalid/v1/",
+                "role_id": "role_id_here",
+                "secret_id": "secret_here",
+            },
+            "password": "${vault:kv/data/app/password}",
+        }
+    )
+    secret_cache = get_session(config).secret_cache
+    secret_cache.put("kv/data/app", "password", "hunter2")
+    hits = secret_cache.hits
+    try:
+        assert config.get_str("password") == "hunter2"
+        assert secret_cache.hits == hits + 1
+    finally:
+        invalidate("kv/data/app/password")
+    assert ("kv/data/app", "password") not in secret_cache
+
+
+def test_vault_cache_per_role():
+    settings = {"address": "https://vault.invalid/v1/", "secret_id": "s"}
+    configs = [
+        Config(
+            entries={
+                "vault": {**settings, "role_id": role_id},
+                "password": "${vault:kv/data/roles/password}",
+            }
+        )
+        for role_id in ("role_a", "role_b")
+    ]
+    first, second = (get_session(config) for config in configs)
+    try:
+        first.secret_cache.put("kv/data/roles", "password", "hunter2")
+        assert configs[0].get_str("password") == "hunter2"
+        assert ("kv/data/roles", "password") not in second.secret_cache
+        invalidate(path="kv/data/roles")
+        assert ("kv/data/roles", "password") not in first.secret_cache
+    finally:
+        for session in (first, second):
+            sessions.pop((session.address, session.role_id)).close()
+
+
+def test_vault_session_per_config(monkeypatch):
+    address = "https://vault.invalid/v1/"
+    calls = []
+    session = sessions[(address, "role")] = VaultSession(
+        address, "role", "secret", transport=mock_vault(calls)
+    )
+    config = Config(
+        entries={
+            "vault": {
+                "address": address,
+                "role_id": "role",
+                "secret_id": "secret",
+            }
+        }
+    )
+    try:
+        assert get_session(config) is session
+        with monkeypatch.context() as patch:
+            # The settings are not read again while the config is unchanged
+            patch.setattr(config, "get_str", None)
+            assert get_session(config) is session
+        config.set("vault/secret_id", "rotated")
+        assert get_session(config) is session
+        assert session.secret_id == "rotated"
+        assert refresh(config, "kv/data/async/user") == "app"
+        assert refresh(config, "kv/data/async/user") == "app"
+        assert calls.count("/v1/kv/data/async") == 2
+    finally:
+        sessions.pop((address, "role")).close()
+
+
+def mock_vault(calls: list[str], login_delay: float = 0):
+    def handler(request: Request) -> Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("auth/approle/login"):
+            sleep(login_delay)
+            token = f"token-{len(calls)}"
+            return Response(
+                200,
+                json={"auth": {"client_token": token, "lease_duration": 60}},
+            )
+        if request.headers["X-Vault-Token"] == "expired":
+            return Response(403, json={"errors": ["permission denied"]})
+        return Response(
+            200,
+            json={"data": {"data": {"user": "app", "password": "hunter2"}}},
+        )
+
+    return MockTransport(handler)
+
+
+def test_vault_session_reuses_token():
+    calls = []
+    session = VaultSession(
+        "https://vault.invalid/v1/",
+        "role",
+        "secret",
+        transport=mock_vault(calls),
+    )
+    try:
+        assert get_secret(session, "kv/data/session/user") == "app"
+        assert get_secret(session, "kv/data/session/password") == "hunter2"
+        assert calls.count("/v1/auth/approle/login") == 1
+        session.token = "expired"
+        session.secret_cache.invalidate("kv/data/session")
+        assert get_secret(session, "kv/data/session/user") == "app"
+        assert calls.count("/v1/auth/approle/login") == 2
+    finally:
+        session.close()
+
+
+def test_vault_session_threads():
+    calls = []
+    session = VaultSession(
+        "https://vault.invalid/v1/",
+        "role",
+        "secret",
+        transport=mock_vault(calls, login_delay=0.05),
+    )
+    secrets = [f"kv/data/threads/{n}/user" for n in range(16)]
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            values = list(
+                executor.map(lambda s: get_secret(session, s), secrets)
+            )
+        assert values == ["app"] * 16
+        assert calls.count("/v1/auth/approle/login") == 1
+    finally:
+        session.close()
+
+
+def test_vault_session_async():
+    calls = []
+    session = VaultSession(
+        "https://vault.invalid/v1/",
+        "role",
+        "secret",
+        transport=mock_vault(calls),
+    )
+
+    async def fetch():
+        try:
+            return await gather(
+                aget_secret(session, "kv/data/async/user"),
+                aget_secret(session, "kv/data/async/password"),
+            )
+        finally:
+            await session.aclose()
+
+    assert run(fetch()) == ["app", "hunter2"]
+    assert calls.count("/v1/auth/approle/login") == 1
+
+
+def test_vault_session_loops():
+    session = VaultSession(
+        "https://vault.invalid/v1/",
+        "role",
+        "secret",
+        transport=mock_vault([]),
+    )
+
+    async def fetch():
+        value = await aget_secret(session, "kv/data/async/user")
+        return value, session.async_client
+
+    # Every event loop, in whichever thread, gets its own client
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: run(fetch()), range(4)))
+    assert [value for value, _ in results] == ["app"] * 4
+    assert len({id(client) for _, client in results}) == 4
+
+    async def close():
+        value, client = await fetch()
+        # Clients of loops that have finished are dropped
+        assert len(session._async_clients) == 1
+        await session.aclose()
+        assert client.is_closed
+        return value
+
+    assert run(close()) == "app"
+
+
+def test_vault_session_sync_and_async():
+    calls = []
+    delays = [0.3, 0.05]
+
+    def handler(request: Request) -> Response:
+        calls.append(request.url.path)
+        token = f"token-{len(calls)}"
+        sleep(delays.pop(0))
+        return Response(
+            200,
+            json={"auth": {"client_token": token, "lease_duration": 60}},
+        )
+
+    session = VaultSession(
+        "https://vault.invalid/v1/",
+        "role",
+        "secret",
+        transport=MockTransport(handler),
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(run, aget_token(session))
+            while not calls:
+                sleep(0.01)
+            # The thread logs in while the slower async login is in flight
+            assert get_token(session) == "token-2"
+            # The async login finishes last but keeps the newer token
+            assert future.result() == "token-2"
+        assert session.token == "token-2"
+    finally:
+        session.close()
+
+
+def test_vault_prefetch():
+    calls = []
+    address = "https://vault.invalid/v1/"
+    session = VaultSession(
+        address, "role", "secret", transport=mock_vault(calls)
+    )
+    sessions[(address, "role")] = session
+    config = Config(
+        entries={
+            "vault": {
+                "address": address,
+                "role_id": "role",
+                "secret_id": "secret",
+            },
+            "db": {
+                "user": "${vault:kv/data/prefetch/db/user}",
+                "password": "${vault:kv/data/prefetch/db/password}",
+            },
+            "api": "${vault:kv/data/prefetch/api/user}",
+        }
+    )
+    try:
+        config.prefetch()
+        assert sorted(calls) == [
+            "/v1/auth/approle/login",
+            "/v1/kv/data/prefetch/api",
+            "/v1/kv/data/prefetch/db",
+        ]
+        assert config.get_str("db/user") == "app"
+        assert config.get_str("db/password") == "hunter2"
+        assert config.get_str("api") == "app"
+        assert len(calls) == 3
+    finally:
+        sessions.pop((address, "role")).close()
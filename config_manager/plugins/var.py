@@ -7,11 +7,31 @@ if TYPE_CHECKING:
 from ..settings import DEFAULT_PATH_DELIMITER
 
 
+def parse_reference(
+    value: str,
+    path_delimiter: str = DEFAULT_PATH_DELIMITER,
+) -> list[str]:
+    """
+    Turn the argument of a ${var:...} reference into the path it refers to.
+    """
+    return value.strip(path_delimiter).split(path_delimiter)
+
+
 def interpolate(
     self: Config,
     value: str,
     path_delimiter: str = DEFAULT_PATH_DELIMITER,
 ) -> str:
-    path = value.strip(path_delimiter).split(path_delimiter)
+    path = parse_reference(value, path_delimiter)
     output = self.get_str(path=path)
     return output
+
+
+async def ainterpolate(
+    self: Config,
+    value: str,
+    path_delimiter: str = DEFAULT_PATH_DELIMITER,
+) -> str:
+    path = parse_reference(value, path_delimiter)
+    output = await self.aget_str(path=path)
+    return output
@@ -1,12 +1,33 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from threading import Lock, RLock
+from weakref import WeakKeyDictionary
+from importlib.util import find_spec
+from time import monotonic
 from typing import TYPE_CHECKING, Any
-from httpx import get, post, Response
 
+# httpx and asyncio are only imported once a secret actually has to be fetched,
+# so configs that never reach Vault (or hit the secret cache) skip them.
 if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, Lock as AsyncLock
+    from httpx import (
+        AsyncBaseTransport,
+        AsyncClient,
+        BaseTransport,
+        Client,
+        Response,
+    )
     from .. import Config
+    from ..tools.overlay import Overlay
 
 SECRET_PATH_DELIMITER = "/"
+DEFAULT_SECRET_CACHE_TTL = 300.0
+DEFAULT_SECRET_CACHE_SIZE = 1024
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+TOKEN_RENEWAL_MARGIN = 0.9
 DEFAULT_VAULT_CONFIGURATION = """
 [vault]
 address = https://vault.[yourdomain].com/v1/
@@ -15,85 +36,583 @@ secret_id = [secret_here]
 """
 
 
-class VaultConfiguration:
+class VaultSession:
+    """
+    A long-lived connection to one Vault address and AppRole. The session
+    keeps its token until it expires or is rejected, and shares one pooled
+    HTTP client (with keep-alive, and HTTP/2 when h2 is installed) across all
+    lookups. Sessions are shared between threads; lock guards creating the
+    client and logging in, so an expired token is only renewed once.
+
+    Each session has its own secret_cache, so secrets read with one AppRole
+    are never served to configs using another.
+    """
+
     def __init__(
         self,
         address: str,
         role_id: str,
         secret_id: str,
         token: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        transport: BaseTransport | AsyncBaseTransport | None = None,
     ):
         self.address = address
         self.role_id = role_id
         self.secret_id = secret_id
         self.token = token
+        self.token_expires: float = float("inf")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.transport = transport
+        self.lock = RLock()
+        self.secret_cache = SecretCache()
+        self._client: Client | None = None
+        # AsyncClients and locks belong to the event loop they were made in
+        self._async_clients: WeakKeyDictionary[
+            AbstractEventLoop, tuple[AsyncClient, AsyncLock]
+        ] = WeakKeyDictionary()
+
+    def client_options(self) -> dict[str, Any]:
+        from httpx import Limits, Timeout
+
+        http2 = self.transport is None and find_spec("h2") is not None
+        return {
+            "timeout": Timeout(self.timeout),
+            "limits": Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            ),
+            "http2": http2,
+            "transport": self.transport,
+        }
+
+    @property
+    def client(self) -> Client:
+        if self._client is None:
+            from httpx import Client
+
+            with self.lock:
+                if self._client is None:
+                    self._client = Client(**self.client_options())
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncClient:
+        return self.bind_loop()[0]
+
+    @property
+    def async_lock(self) -> AsyncLock:
+        return self.bind_loop()[1]
+
+    def bind_loop(self) -> tuple[AsyncClient, AsyncLock]:
+        """
+        Return the pooled AsyncClient and login lock for the running event
+        loop, creating them on first use. A client cannot be shared between
+        loops, so each loop (in any thread) gets its own; clients are dropped
+        with their loop, or once the loop has been closed.
+        """
+        from asyncio import Lock as AsyncLock, get_running_loop
+        from httpx import AsyncClient
+
+        loop = get_running_loop()
+        with self.lock:
+            bound = self._async_clients.get(loop)
+            if bound is None or bound[0].is_closed:
+                for closed in [
+                    other
+                    for other in self._async_clients
+                    if other.is_closed()
+                ]:
+                    del self._async_clients[closed]
+                bound = self._async_clients[loop] = (
+                    AsyncClient(**self.client_options()),
+                    AsyncLock(),
+                )
+        return bound
+
+    @property
+    def token_valid(self) -> bool:
+        return self.token is not None and monotonic() < self.token_expires
+
+    def close(self) -> None:
+        with self.lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """
+        Close the AsyncClients of this and any other running event loop.
+        Call it before a loop finishes, as a client cannot be closed once
+        its loop has been.
+        """
+        from asyncio import get_running_loop, run_coroutine_threadsafe
+        from asyncio import wrap_future
+
+        current = get_running_loop()
+        with self.lock:
+            bound = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, (client, _) in bound:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                await wrap_future(
+                    run_coroutine_threadsafe(client.aclose(), loop)
+                )
+
+
+class SecretCache:
+    """
+    In-process LRU cache of secret values keyed by (path, key). Entries expire
+    after the lease duration Vault returned for them, or after the configured
+    ttl for secrets without a lease (such as KV version 2).
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_SECRET_CACHE_SIZE,
+        ttl: float = DEFAULT_SECRET_CACHE_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item: tuple[str, str]) -> bool:
+        with self._lock:
+            entry = self._entries.get(item)
+            return entry is not None and entry[0] > monotonic()
+
+    def get(self, path: str, key: str) -> tuple[bool, Any]:
+        """
+        Return (found, value) for a cached secret, counting hits and misses.
+        """
+        with self._lock:
+            entry = self._entries.get((path, key))
+            if entry is not None:
+                if entry[0] > monotonic():
+                    self._entries.move_to_end((path, key))
+                    self.hits += 1
+                    return True, entry[1]
+                del self._entries[(path, key)]
+            self.misses += 1
+            return False, None
+
+    def put(
+        self,
+        path: str,
+        key: str,
+        value: Any,
+        lease_duration: float | None = None,
+    ) -> None:
+        """
+        Store a secret. A positive lease_duration overrides the default ttl.
+        """
+        ttl = lease_duration if lease_duration else self.ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[(path, key)] = (monotonic() + ttl, value)
+            self._entries.move_to_end((path, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path: str | None = None, key: str | None = None):
+        """
+        Drop cached secrets. With no arguments the whole cache is cleared; with
+        only a path, every key under that path is dropped.
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = path.strip(SECRET_PATH_DELIMITER)
+            if key is not None:
+                self._entries.pop((path, key), None)
+                return
+            for entry in [e for e in self._entries if e[0] == path]:
+                del self._entries[entry]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
 
-active_vault: VaultConfiguration | None = None
+sessions: dict[tuple[str, str], VaultSession] = {}
+# The session each config last used, with the overlay it was read from
+config_sessions: WeakKeyDictionary[Config, tuple[Overlay, VaultSession]] = (
+    WeakKeyDictionary()
+)
+# Guards sessions and config_sessions, which every thread shares
+sessions_lock = Lock()
 
 
 def interpolate(self: Config, value: str) -> str:
-    global active_vault
-    if active_vault is None:
-        if "vault" not in self.entries:
-            m = (
-                "Configuration must include a section for Vault configuration\n"
-                f"Example INI configuration:\n{DEFAULT_VAULT_CONFIGURATION}"
+    return get_secret(get_session(self), value)
+
+
+async def ainterpolate(self: Config, value: str) -> str:
+    return await aget_secret(get_session(self), value)
+
+
+def prefetch(self: Config, values: list[str]) -> None:
+    """
+    Fetch every secret path referenced by values exactly once, in parallel,
+    and store all referenced keys in the secret cache.
+    """
+    session = get_session(self)
+    paths = group_secrets(session, values)
+    if not paths:
+        return
+    if not session.token_valid:
+        get_token(session, stale_token=session.token)
+    workers = min(len(paths), session.max_connections)
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        responses = executor.map(
+            lambda path: vault_request(session, path), paths
+        )
+        for (path, keys), response in zip(paths.items(), responses):
+            cache_response(session, path, keys, response)
+
+
+async def aprefetch(self: Config, values: list[str]) -> None:
+    """
+    Asynchronous version of prefetch; every path is fetched concurrently.
+    """
+    session = get_session(self)
+    paths = group_secrets(session, values)
+    if not paths:
+        return
+    from asyncio import gather
+
+    responses = await gather(
+        *(avault_request(session, path) for path in paths)
+    )
+    for (path, keys), response in zip(paths.items(), responses):
+        cache_response(session, path, keys, response)
+
+
+def group_secrets(
+    session: VaultSession, values: list[str]
+) -> dict[str, list[str]]:
+    """
+    Group secret references by Vault path, leaving out keys that are already
+    in the session's cache.
+    """
+    paths: dict[str, list[str]] = {}
+    for value in values:
+        path, key = split_secret(value)
+        if (path, key) not in session.secret_cache:
+            paths.setdefault(path, []).append(key)
+    return paths
+
+
+def cache_response(
+    session: VaultSession, path: str, keys: list[str], response: Response
+) -> None:
+    """
+    Store the requested keys of a fetched secret document in the session's
+    cache.
+    """
+    data = get_response_value(response, ["data", "data"])
+    lease_duration = response.json().get("lease_duration")
+    for key in keys:
+        if key in data:
+            session.secret_cache.put(path, key, data[key], lease_duration)
+
+
+def get_session(self: Config) -> VaultSession:
+    """
+    Return the shared VaultSession for this config's address and role_id,
+    creating it on first use. The session is remembered for each config
+    until its values change (by set or a reload), so the vault settings are
+    only read again then.
+    """
+    overlay = self.overlay
+    with sessions_lock:
+        remembered = config_sessions.get(self)
+        if remembered is not None and remembered[0] is overlay:
+            session = remembered[1]
+            # Unless the session has been closed since
+            if sessions.get((session.address, session.role_id)) is session:
+                return session
+    vault_settings = get_vault_settings(self)
+    if vault_settings is None:
+        m = (
+            "Configuration must include a section for Vault configuration\n"
+            f"Example INI configuration:\n{DEFAULT_VAULT_CONFIGURATION}"
+        )
+        raise KeyError(m)
+    address = self.get_str(["vault", "address"])
+    role_id = self.get_str(["vault", "role_id"])
+    secret_id = self.get_str(["vault", "secret_id"])
+    with sessions_lock:
+        session = sessions.get((address, role_id))
+        if session is None:
+            session = new_session(vault_settings, address, role_id, secret_id)
+            sessions[(address, role_id)] = session
+        elif session.secret_id != secret_id:
+            with session.lock:
+                session.secret_id = secret_id
+                session.token = None
+        config_sessions[self] = (overlay, session)
+    configure_cache(self, session)
+    return session
+
+
+def new_session(
+    vault_settings: dict, address: str, role_id: str, secret_id: str
+) -> VaultSession:
+    """
+    Create a session, applying the optional connection settings from the
+    vault section.
+    """
+    return VaultSession(
+        address=address,
+        role_id=role_id,
+        secret_id=secret_id,
+        timeout=float(vault_settings.get("timeout", DEFAULT_TIMEOUT)),
+        max_connections=int(
+            vault_settings.get("max_connections", DEFAULT_MAX_CONNECTIONS)
+        ),
+        max_keepalive_connections=int(
+            vault_settings.get(
+                "max_keepalive_connections",
+                DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
             )
-            raise KeyError(m)
-    active_vault = VaultConfiguration(
-        address=self.get_str(["vault", "address"]),
-        role_id=self.get_str(["vault", "role_id"]),
-        secret_id=self.get_str(["vault", "secret_id"]),
-        token=None,
+        ),
     )
-    return get_secret(active_vault, value)
 
 
-def check_token(f):
+def get_vault_settings(self: Config) -> dict | None:
     """
-    Wrap function; if it fails, run it again with argument renewToken=True
+    Return the raw vault section of the config, or None if there is none.
     """
+    try:
+        return self.lookup(["vault"])
+    except KeyError:
+        return None
 
-    def wrapper(*args, **kwargs):
-        try:
-            return f(*args, **kwargs)
-        except Exception:
-            return f(*args, **kwargs, renewToken=True)
 
-    return wrapper
+def close_sessions() -> None:
+    """
+    Close every pooled Vault client and forget their tokens.
+    """
+    with sessions_lock:
+        closing = list(sessions.values())
+        sessions.clear()
+        config_sessions.clear()
+    for session in closing:
+        session.close()
 
 
-@check_token
-def get_secret(
-    self: VaultConfiguration, secret: str, renew_token: bool = False
-) -> Any:
+def configure_cache(self: Config, session: VaultSession) -> None:
     """
-    Get a secret from a Hashicorp Vault secrets manager.
+    Apply optional vault/cache_ttl and vault/cache_size settings to the
+    session's secret cache.
+    """
+    vault_settings = get_vault_settings(self) or {}
+    if "cache_ttl" in vault_settings:
+        session.secret_cache.ttl = float(vault_settings["cache_ttl"])
+    if "cache_size" in vault_settings:
+        session.secret_cache.max_size = int(vault_settings["cache_size"])
+
+
+def split_secret(secret: str) -> tuple[str, str]:
+    """
+    Split a secret reference into its Vault path and key.
     """
-    if self.token is None or renew_token:
-        print("Config Manager: getting new Vault token")
-        self.token = get_token(self)
-        print("Config Manager: Vault token obtained")
     secret = secret.strip(SECRET_PATH_DELIMITER)
-    path = SECRET_PATH_DELIMITER.join(secret.split(SECRET_PATH_DELIMITER)[0:-1])
-    key = secret.split(SECRET_PATH_DELIMITER)[-1]
-    response = get(self.address + path, headers={"X-Vault-Token": self.token})
+    path, _, key = secret.rpartition(SECRET_PATH_DELIMITER)
+    return path, key
+
+
+def invalidate(secret: str | None = None, path: str | None = None) -> None:
+    """
+    Drop a secret reference (path/key), every key under a Vault path, or
+    with neither, every cached secret from the caches of all sessions.
+    """
+    with sessions_lock:
+        caches = [session.secret_cache for session in sessions.values()]
+    key = None
+    if secret is not None:
+        path, key = split_secret(secret)
+    for cache in caches:
+        cache.invalidate(path, key)
+
+
+def refresh(self: Config, secret: str) -> Any:
+    """
+    Fetch a secret from Vault again with this config's session, replacing
+    any cached value.
+    """
+    session = get_session(self)
+    path, key = split_secret(secret)
+    session.secret_cache.invalidate(path, key)
+    return get_secret(session, secret)
+
+
+def get_secret(self: VaultSession, secret: str) -> Any:
+    """
+    Get a secret from a Hashicorp Vault secrets manager. Secrets are served
+    from the secret cache until their lease or ttl expires.
+    """
+    path, key = split_secret(secret)
+    found, output = self.secret_cache.get(path, key)
+    if found:
+        return output
+    response = vault_request(self, path)
     output = get_response_value(response, ["data", "data", key])
+    self.secret_cache.put(
+        path, key, output, response.json().get("lease_duration")
+    )
     return output
 
 
-def get_token(self: VaultConfiguration) -> str:
+def vault_request(self: VaultSession, path: str) -> Response:
+    """
+    GET a Vault path with the session token, logging in first if the token is
+    missing or expired, and once more if Vault rejects it. Concurrent threads
+    share a single login.
+    """
+    token = self.token
+    if not self.token_valid:
+        token = get_token(self, stale_token=token)
+    response = self.client.get(
+        self.address + path, headers={"X-Vault-Token": token}
+    )
+    if response.status_code in (401, 403):
+        token = get_token(self, stale_token=token)
+        response = self.client.get(
+            self.address + path, headers={"X-Vault-Token": token}
+        )
+    return response
+
+
+async def aget_secret(self: VaultSession, secret: str) -> Any:
     """
-    Get or renew a token from the Hashicorp Vault API.
+    Asynchronous version of get_secret using the session's AsyncClient.
     """
-    url = self.address + "auth/approle/login"
-    data = {"role_id": self.role_id, "secret_id": self.secret_id}
-    response = post(url, data=data)
-    output = get_response_value(response, ["auth", "client_token"])
+    path, key = split_secret(secret)
+    found, output = self.secret_cache.get(path, key)
+    if found:
+        return output
+    response = await avault_request(self, path)
+    output = get_response_value(response, ["data", "data", key])
+    self.secret_cache.put(
+        path, key, output, response.json().get("lease_duration")
+    )
     return output
 
 
+async def avault_request(self: VaultSession, path: str) -> Response:
+    """
+    Asynchronous version of vault_request. Concurrent requests share a single
+    login when the token is missing, expired or rejected.
+    """
+    token = self.token
+    if not self.token_valid:
+        token = await aget_token(self, stale_token=token)
+    response = await self.async_client.get(
+        self.address + path, headers={"X-Vault-Token": token}
+    )
+    if response.status_code in (401, 403):
+        token = await aget_token(self, stale_token=token)
+        response = await self.async_client.get(
+            self.address + path, headers={"X-Vault-Token": token}
+        )
+    return response
+
+
+async def aget_token(
+    self: VaultSession, stale_token: str | None = None
+) -> str:
+    """
+    Log in unless another task already replaced stale_token while this one
+    was waiting for the lock. The new token is stored under the session's
+    thread lock so a login from a thread or another event loop is not
+    overwritten.
+    """
+    from asyncio import get_running_loop
+
+    async with self.async_lock:
+        if self.token_valid and self.token != stale_token:
+            return self.token
+        url = self.address + "auth/approle/login"
+        data = {"role_id": self.role_id, "secret_id": self.secret_id}
+        response = await self.async_client.post(url, data=data)
+        auth = get_response_value(response, ["auth"])
+        loop = get_running_loop()
+        return await loop.run_in_executor(
+            None, store_token, self, auth, stale_token
+        )
+
+
+def get_token(self: VaultSession, stale_token: str | None = None) -> str:
+    """
+    Get or renew a token from the Hashicorp Vault API, unless another thread
+    already replaced stale_token while this one was waiting for the lock.
+    """
+    with self.lock:
+        if self.token_valid and self.token != stale_token:
+            return self.token
+        url = self.address + "auth/approle/login"
+        data = {"role_id": self.role_id, "secret_id": self.secret_id}
+        response = self.client.post(url, data=data)
+        set_token(self, get_response_value(response, ["auth"]))
+        return self.token
+
+
+def store_token(
+    self: VaultSession, auth: dict, stale_token: str | None = None
+) -> str:
+    """
+    Store a token from an async login unless another caller already replaced
+    stale_token, and return the current token.
+    """
+    with self.lock:
+        if not (self.token_valid and self.token != stale_token):
+            set_token(self, auth)
+        return self.token
+
+
+def set_token(self: VaultSession, auth: dict) -> None:
+    """
+    Store the client token from a login response along with its expiry.
+    """
+    try:
+        self.token = auth["client_token"]
+    except KeyError as e:
+        m = f"Path ['auth', 'client_token'] not found in response:\n{auth}"
+        raise KeyError(m) from e
+    lease_duration = auth.get("lease_duration") or 0
+    self.token_expires = (
+        monotonic() + lease_duration * TOKEN_RENEWAL_MARGIN
+        if lease_duration > 0
+        else float("inf")
+    )
+
+
 def get_response_value(response: Response, path: list[str] = []) -> Any:
     """
     Take the result of a requests call and format it into a structured dict.
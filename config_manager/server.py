@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from json import dumps as dump_json, loads as load_json
+from os import chmod
+from pathlib import Path
+from socket import AF_UNIX, SOCK_STREAM, socket
+from stat import S_ISSOCK
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Lock
+from typing import Any, Callable
+
+from . import Config
+
+
+class ConfigServer(ThreadingUnixStreamServer):
+    """
+    Serve lookups from one loaded Config over a Unix domain socket, so clients
+    skip interpreter startup and file parsing. The Config (and with it the
+    interpolation and secret caches) stays warm between requests, and is
+    rebuilt when any of its files change.
+
+    The protocol is one JSON object per line in each direction. Requests have
+    an "op" of "get" (with "path" or "paths"), "export" or "build" (with
+    "template" and optional "output"). Responses have "ok" and either a
+    "value"/"values" or an "error" and "message".
+
+    Resolved values include secrets, so the socket is only accessible to the
+    user running the server. Build requests may only read templates and
+    write outputs under build_root, and are refused when it is None.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        factory: Callable[[], Config],
+        build_root: Path | None = None,
+    ):
+        self.socket_path = socket_path
+        self.factory = factory
+        self.build_root = build_root.resolve() if build_root else None
+        self.lock = Lock()
+        self.config = factory()
+        self.file_state = self.get_file_state()
+        remove_stale_socket(socket_path)
+        super().__init__(str(socket_path), ConfigRequestHandler)
+
+    def server_bind(self) -> None:
+        super().server_bind()
+        # Restrict the socket before server_activate starts listening on it
+        chmod(self.socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def get_file_state(self) -> list[tuple[int, int] | None]:
+        output = []
+        for path in (
+            self.config.default_config,
+            self.config.config_file,
+            self.config.deploy_config,
+        ):
+            try:
+                stat = path.stat() if path else None
+                output.append(stat and (stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                output.append(None)
+        return output
+
+    def reload_if_changed(self) -> None:
+        file_state = self.get_file_state()
+        if file_state != self.file_state:
+            self.config = self.factory()
+            self.file_state = self.get_file_state()
+
+    def handle_request_data(self, request: dict) -> dict:
+        # Only reloading takes the lock; Config is safe to share between
+        # threads, so slow builds and Vault lookups do not hold up others
+        with self.lock:
+            self.reload_if_changed()
+            config = self.config
+        op = request.get("op")
+        if op == "get" and "paths" in request:
+            values = [config.get(path) for path in request["paths"]]
+            return {"ok": True, "values": values}
+        if op == "get":
+            return {"ok": True, "value": config.get(request["path"])}
+        if op == "export":
+            return {"ok": True, "value": config.overlay.merge(keep=False)}
+        if op == "build":
+            template = self.check_build_path(request["template"])
+            output = request.get("output")
+            config.interpolate_file(
+                template,
+                self.check_build_path(output) if output else None,
+            )
+            return {"ok": True}
+        raise ValueError(f"Unknown operation {op!r}")
+
+    def check_build_path(self, path: str) -> Path:
+        """
+        Resolve a template or output path of a build request, refusing paths
+        outside of build_root.
+        """
+        if self.build_root is None:
+            raise PermissionError("This server does not accept builds")
+        resolved = Path(path).resolve()
+        if not resolved.is_relative_to(self.build_root):
+            m = f"Path {path} is outside of the build root {self.build_root}"
+            raise PermissionError(m)
+        return resolved
+
+
+def remove_stale_socket(socket_path: Path) -> None:
+    """
+    Remove a socket left behind by a previous server, refusing to remove
+    anything else that exists at socket_path.
+    """
+    try:
+        mode = socket_path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not S_ISSOCK(mode):
+        m = f"{socket_path} already exists and is not a socket"
+        raise FileExistsError(m)
+    socket_path.unlink()
+
+
+class ConfigRequestHandler(StreamRequestHandler):
+    server: ConfigServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.handle_request_data(load_json(line))
+            except Exception as e:
+                response = {
+                    "ok": False,
+                    "error": type(e).__name__,
+                    "message": str(e),
+                }
+            self.wfile.write(dump_json(response, default=str).encode())
+            self.wfile.write(b"\n")
+            self.wfile.flush()
+
+
+def serve(
+    socket_path: Path,
+    factory: Callable[[], Config],
+    build_root: Path | None = None,
+) -> None:
+    """
+    Serve a Config until interrupted.
+    """
+    with ConfigServer(socket_path, factory, build_root) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def query(socket_path: Path, request: dict) -> Any:
+    """
+    Send one request to a running ConfigServer and return its response,
+    raising the server's error as a RuntimeError.
+    """
+    with socket(AF_UNIX, SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall(dump_json(request).encode() + b"\n")
+        with client.makefile("rb") as stream:
+            response = load_json(stream.readline())
+    if not response["ok"]:
+        raise RuntimeError(f"{response['error']}: {response['message']}")
+    return response
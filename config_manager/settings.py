@@ -1,2 +1,8 @@
 DEFAULT_INTERPOLATION_PATTERN = r"\${([^:]*):([^}]*)}"
 DEFAULT_PATH_DELIMITER = "/"
+TEMPLATE_CACHE_SIZE = 4096
+TEMPLATE_FILE_CACHE_SIZE = 256
+PATH_CACHE_SIZE = 4096
+CACHEABLE_PLUGINS = ("var",)
+CACHE_DIR_ENVIRONMENT_VARIABLE = "CONFIG_MANAGER_CACHE_DIR"
+YAML_PURE_PYTHON_ENVIRONMENT_VARIABLE = "CONFIG_MANAGER_YAML_PURE_PYTHON"
@@ -1,30 +1,104 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
 from importlib import import_module
 from pathlib import Path
+from typing import Any
 
+from ..tools.files import atomic_writer, file_lock, has_content
 
-def load(path: Path) -> dict:
-    try:
-        target_module = import_module(path.suffix, "config_manager.storage")
-        output = target_module.load(path)
-        return output
-    except ModuleNotFoundError as e:
-        m = (
-            f"Loading configuration data from file of type {path.suffix} is "
-            "not yet supported."
-        )
-        raise NotImplementedError(m) from e
+ENTRY_POINT_GROUP = "config_manager.storage"
+# Built-in backends, imported the first time a file of their type is used
+BACKEND_MODULES: dict[str, str] = {
+    ".ini": ".ini",
+    ".cfg": ".ini",
+    ".json": ".json",
+    ".msgpack": ".msgpack",
+    ".yaml": ".yaml",
+    ".yml": ".yaml",
+}
+backends: dict[str, Any] = {}
+
+
+def register_backend(suffix: str, backend: Any) -> None:
+    """
+    Handle files ending in suffix with backend, any object (usually a module)
+    with load(path) and save(path, data) functions. Backends that also have
+    dumps(data), returning str or bytes, get atomic and change-aware saves.
+    Registered backends take precedence over the built-in ones.
+    """
+    if not suffix.startswith("."):
+        suffix = f".{suffix}"
+    backends[suffix.lower()] = backend
 
 
-def save(path: Path, data: dict) -> None:
+def find_entry_point(suffix: str) -> Any | None:
     """
-    Write configurations to a configuration file.
+    Look up a backend installed by another package under the
+    config_manager.storage entry point group, named by its suffix with or
+    without the leading dot.
     """
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name.lower() in (suffix, suffix[1:]):
+            return entry_point.load()
+    return None
+
+
+def get_backend(suffix: str) -> Any:
+    """
+    Return the backend for a file suffix, resolving it only the first time.
+    """
+    suffix = suffix.lower()
+    backend = backends.get(suffix)
+    if backend is not None:
+        return backend
     try:
-        target_module = import_module(path.suffix, "config_manager.storage")
-        target_module.save(path, data)
+        if suffix in BACKEND_MODULES:
+            backend = import_module(
+                BACKEND_MODULES[suffix], "config_manager.storage"
+            )
+        else:
+            backend = find_entry_point(suffix)
     except ModuleNotFoundError as e:
+        # Backends for optional formats import their library at the top
         m = (
-            f"Loading configuration data from file of type {path.suffix} is "
-            "not yet supported."
+            f"Configuration files of type {suffix} need the {e.name} package "
+            "to be installed."
         )
         raise NotImplementedError(m) from e
+    if backend is None:
+        m = f"Configuration files of type {suffix} are not yet supported."
+        raise NotImplementedError(m)
+    backends[suffix] = backend
+    return backend
+
+
+def load(path: Path) -> dict:
+    output = get_backend(path.suffix).load(path)
+    return output
+
+
+def save(path: Path, data: dict, lock: bool = False) -> bool:
+    """
+    Write configurations to a configuration file. The file is left alone
+    when it already holds exactly the serialized data, and otherwise replaced
+    atomically. With lock, concurrent writers using it are serialized by an
+    advisory lock. Returns whether the file was written.
+    """
+    backend = get_backend(path.suffix)
+    if not hasattr(backend, "dumps"):
+        backend.save(path, data)
+        return True
+    content = backend.dumps(data)
+    if isinstance(content, str):
+        content = content.encode()
+    # Write through symlinks (e.g. mounted config maps) rather than over them
+    path = path.resolve()
+    with file_lock(path) if lock else nullcontext():
+        if has_content(path, content):
+            return False
+        with atomic_writer(path, binary=True) as stream:
+            stream.write(content)
+    return True
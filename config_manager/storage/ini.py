@@ -1,46 +1,56 @@
 from pathlib import Path
-from re import match, sub
 from json import dumps as dump_json
 
 
-COMMENT_PREFIXES: list[str] = [
+COMMENT_PREFIXES: tuple[str, ...] = (
     ";",
     "#",
     "/",
-]
-GROUP_PATTERN = r"^\[(.+)\]$"
-ENTRY_PATTERN = r"^([\S]*)[ ]*=[ ]*(.*)$"
+)
 
 
 def load(path: Path) -> dict:
+    return loads(path.read_text())
+
+
+def loads(text: str) -> dict:
+    """
+    Parse INI text in a single pass. Each line is classified by its first
+    character and split on its first "=", so keys cannot contain "=" but
+    values can. As before, lines whose key contains whitespace are not
+    entries and are skipped.
+    """
     output = {}
-    current_group = None
-    file_content = path.read_text()
-    for line in file_content.splitlines():
+    group = None
+    for line in text.splitlines():
         line = line.strip()
-        if not line:
+        if not line or line[0] in COMMENT_PREFIXES:
             continue
-        elif line[0] in COMMENT_PREFIXES:
+        if line[0] == "[" and line[-1] == "]" and len(line) > 2:
+            group = output.setdefault(line[1:-1], {})
             continue
-        elif match(GROUP_PATTERN, line):
-            current_group = sub(GROUP_PATTERN, "\\1", line)
-            if current_group not in output.keys():
-                output[current_group] = {}
-        elif match(ENTRY_PATTERN, line):
-            key = sub(ENTRY_PATTERN, "\\1", line)
-            value = sub(ENTRY_PATTERN, "\\2", line)
-            output[current_group][key] = value
+        key, separator, value = line.partition("=")
+        key = key.rstrip()
+        if not separator or len(key.split()) > 1:
+            continue
+        if group is None:
+            m = f"Entry outside of a group: {line}"
+            raise ValueError(m)
+        group[key] = value.lstrip()
     return output
 
 
-def save(path: Path, data: dict):
-    new_file = ""
+def dumps(data: dict) -> str:
+    lines = []
     for group, keys in data.items():
-        new_file += f"[{group}]\n"
+        lines.append(f"[{group}]\n")
         for key, value in keys.items():
             if isinstance(value, (list, dict, bool)):
-                new_file += f"{key} = {dump_json(value)}\n"
-                continue
-            new_file += f"{key} = {value}\n"
-        new_file += "\n"
-    path.write_text(new_file)
+                value = dump_json(value)
+            lines.append(f"{key} = {value}\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def save(path: Path, data: dict):
+    path.write_text(dumps(data))
@@ -1,13 +1,17 @@
-from json import dumps as dump_json, loads as load_json
 from pathlib import Path
 
+from ..tools.codec import dump_json_bytes, load_json
+
 
 def load(path: Path) -> dict:
-    file_content = path.read_text()
+    file_content = path.read_bytes()
     output = load_json(file_content)
     return output
 
 
+def dumps(data: dict) -> bytes:
+    return dump_json_bytes(data)
+
+
 def save(path: Path, data: dict):
-    output = dump_json(data, indent=2)
-    path.write_text(output)
+    path.write_bytes(dumps(data))
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from msgpack import packb, unpackb
+
+
+def load(path: Path) -> dict:
+    file_content = path.read_bytes()
+    output = unpackb(file_content, strict_map_key=False)
+    return output
+
+
+def dumps(data: dict) -> bytes:
+    return packb(data, use_bin_type=True)
+
+
+def save(path: Path, data: dict):
+    path.write_bytes(dumps(data))
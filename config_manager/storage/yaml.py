@@ -1,15 +1,44 @@
-from yaml import safe_load as load_yaml, dump
+from os import environ
 from pathlib import Path
 
+from yaml import SafeDumper, SafeLoader, dump, load as load_yaml
+
+from ..settings import YAML_PURE_PYTHON_ENVIRONMENT_VARIABLE
+
+try:
+    from yaml import CSafeDumper, CSafeLoader
+except ImportError:
+    # PyYAML was built without libyaml
+    CSafeDumper = CSafeLoader = None
+
+# Set to True (or set the environment variable) to always use the pure
+# Python parser and emitter, even when libyaml is available
+pure_python = bool(environ.get(YAML_PURE_PYTHON_ENVIRONMENT_VARIABLE))
+
+
+def get_loader() -> type:
+    if pure_python or CSafeLoader is None:
+        return SafeLoader
+    return CSafeLoader
+
+
+def get_dumper() -> type:
+    if pure_python or CSafeDumper is None:
+        return SafeDumper
+    return CSafeDumper
+
 
 def load(path: Path) -> dict:
-    file_content = path.read_text()
-    output = load_yaml(file_content)
+    with path.open("rb") as stream:
+        output = load_yaml(stream, Loader=get_loader())
     if output is None:
         output = {}
     return output
 
 
+def dumps(data: dict) -> str:
+    return dump(data, Dumper=get_dumper())
+
+
 def save(path: Path, data: dict):
-    output = dump(data)
-    path.write_text(output)
+    path.write_text(dumps(data))
@@ -1,4 +1,7 @@
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterator
+
+from ..settings import PATH_CACHE_SIZE
 
 
 def merge_dictionaries(source: dict, destination: dict) -> None:
@@ -13,6 +16,15 @@ def merge_dictionaries(source: dict, destination: dict) -> None:
             destination[key] = value
 
 
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def split_path(path: str, delimiter: str) -> tuple[str, ...]:
+    """
+    Split a path string into its levels. The same paths tend to be read over
+    and over, so recent results are cached.
+    """
+    return tuple(path.strip(delimiter).split(delimiter))
+
+
 def get_nested_value(path: list[str], input: dict | list) -> Any:
     """
     Get a value from a nested dictionary.
@@ -57,3 +69,56 @@ def set_nested_value(
         "dict or list"
     )
     raise ValueError(m)
+
+
+def iter_strings(input: Any) -> Iterator[str]:
+    """
+    Yield every string value in a nested structure of dictionaries and lists.
+    """
+    if isinstance(input, str):
+        yield input
+    elif isinstance(input, dict):
+        for value in input.values():
+            yield from iter_strings(value)
+    elif isinstance(input, list):
+        for value in input:
+            yield from iter_strings(value)
+
+
+def iter_string_paths(
+    input: Any, prefix: tuple = ()
+) -> Iterator[tuple[tuple, str]]:
+    """
+    Yield the path and value of every string in a nested structure of
+    dictionaries and lists, with list indices as strings.
+    """
+    if isinstance(input, str):
+        yield prefix, input
+    elif isinstance(input, dict):
+        for key, value in input.items():
+            yield from iter_string_paths(value, (*prefix, key))
+    elif isinstance(input, list):
+        for index, value in enumerate(input):
+            yield from iter_string_paths(value, (*prefix, str(index)))
+
+
+def replace_values(
+    input: Any, values: dict[tuple, Any], prefix: tuple = ()
+) -> Any:
+    """
+    Copy a nested structure of dictionaries and lists, replacing the values
+    at the paths in values.
+    """
+    if prefix in values:
+        return values[prefix]
+    if isinstance(input, dict):
+        return {
+            key: replace_values(value, values, (*prefix, key))
+            for key, value in input.items()
+        }
+    if isinstance(input, list):
+        return [
+            replace_values(value, values, (*prefix, str(index)))
+            for index, value in enumerate(input)
+        ]
+    return input
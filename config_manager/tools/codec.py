@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+from math import isfinite
+from typing import Any, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STDLIB_OPTIONS: dict[bool, dict[str, Any]] = {
+    False: {"indent": 2},
+    True: {"separators": (",", ":")},
+}
+
+
+def dump_json_bytes(value: Any, compact: bool = False) -> bytes:
+    """
+    Serialize value as JSON, indented by two spaces unless compact is set.
+    Like the json module's default, characters outside ASCII are escaped.
+    orjson is used when it is installed and its output is plain ASCII.
+    Everything else goes through the json module, so that nothing is lost:
+    output that is not ASCII, values orjson cannot serialize (such as
+    integers wider than 64 bits), and values holding NaN or infinities,
+    which orjson would write as null. The only remaining difference is that
+    orjson formats some floats differently (1e16 rather than 1e+16), which
+    reads back as the same number.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        try:
+            output = orjson.dumps(value, option=option)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            # NaN and infinities come out as null, which is rare enough to
+            # check for before walking value
+            if output.isascii() and (
+                b"null" not in output or not has_non_finite(value)
+            ):
+                return output
+    return json.dumps(value, **STDLIB_OPTIONS[compact]).encode()
+
+
+def has_non_finite(value: Any) -> bool:
+    """
+    Whether value holds a float that is NaN or infinite at any depth.
+    """
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, float):
+            if not isfinite(node):
+                return True
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return False
+
+
+def dump_json(value: Any, compact: bool = False) -> str:
+    if orjson is not None:
+        return dump_json_bytes(value, compact).decode()
+    return json.dumps(value, **STDLIB_OPTIONS[compact])
+
+
+def load_json(data: str | bytes) -> Any:
+    """
+    Parse JSON with orjson when it is installed, falling back to the json
+    module for documents orjson rejects, such as ones containing NaN or
+    Infinity.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dump_json_key(key: Any) -> str:
+    """
+    Encode a dictionary key the way dump_json does, converting keys that are
+    not strings.
+    """
+    if isinstance(key, bool) or key is None:
+        key = {True: "true", False: "false", None: "null"}[key]
+    elif not isinstance(key, str):
+        key = dump_json(key)
+    return dump_json(key)
+
+
+def iter_json(
+    value: Any, compact: bool = False, depth: int = 0
+) -> Iterator[str]:
+    """
+    Encode value as JSON piece by piece, producing the same text as
+    dump_json. Only the containers along the current path are in flight, so
+    memory use follows the depth of value rather than the size of the output.
+    """
+    if isinstance(value, dict):
+        start, end = "{", "}"
+        items: Iterator = (
+            (dump_json_key(key), item) for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        start, end = "[", "]"
+        items = ((None, item) for item in value)
+    else:
+        yield dump_json(value, compact=True)
+        return
+    if not value:
+        yield start + end
+        return
+    if compact:
+        opening, separator, closing, colon = "", ",", "", ":"
+    else:
+        opening = "\n" + "  " * (depth + 1)
+        separator = "," + opening
+        closing = "\n" + "  " * depth
+        colon = ": "
+    yield start + opening
+    for index, (key, item) in enumerate(items):
+        if index:
+            yield separator
+        if key is not None:
+            yield key + colon
+        yield from iter_json(item, compact, depth + 1)
+    yield closing + end
+
+
+def iter_json_lines(
+    value: Any, prefix: tuple = (), delimiter: str = "/"
+) -> Iterator[str]:
+    """
+    Encode value as JSON Lines, one compact [path, value] array per line for
+    every value that is not a dictionary (and for empty dictionaries).
+    """
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from iter_json_lines(item, (*prefix, key), delimiter)
+        return
+    path = delimiter.join(str(level) for level in prefix)
+    yield dump_json([path, value], compact=True) + "\n"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from hashlib import sha256
+from os import fstat, getuid, stat_result
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL, dump, load
+from typing import Any
+
+from .files import atomic_writer
+
+CACHE_SUFFIX = ".pickle"
+# Part of every cache file name, so caches written in an older layout are
+# never read
+CACHE_FORMAT = "layers-1"
+Fingerprint = tuple[str, str, int, int, str]
+
+
+def fingerprint(role: str, path: Path) -> Fingerprint:
+    """
+    Identify the current contents of a configuration file by its role, path,
+    modification time, size and content hash.
+    """
+    stat = path.stat()
+    digest = sha256(path.read_bytes()).hexdigest()
+    return (role, str(path.resolve()), stat.st_mtime_ns, stat.st_size, digest)
+
+
+def fingerprints(files: dict[str, Path]) -> list[Fingerprint]:
+    return [fingerprint(role, path) for role, path in files.items()]
+
+
+def cache_path(cache_dir: Path, files: dict[str, Path]) -> Path:
+    """
+    Every combination of layers gets its own cache file.
+    """
+    key = "\0".join(
+        [CACHE_FORMAT]
+        + [f"{role}={path.resolve()}" for role, path in files.items()]
+    )
+    return cache_dir / (sha256(key.encode()).hexdigest()[:32] + CACHE_SUFFIX)
+
+
+def trusted(status: stat_result) -> bool:
+    """
+    Unpickling runs arbitrary code, so caches are only read from files and
+    directories that belong to the current user and that nobody else can
+    write to.
+    """
+    return status.st_uid == getuid() and not status.st_mode & 0o022
+
+
+def read_cache(cache_dir: Path, files: dict[str, Path]) -> dict | None:
+    """
+    Return the cached layers parsed from files, or None if there is no cache,
+    any file has changed since it was written, or the cache is not trusted.
+    """
+    try:
+        if not trusted(cache_dir.stat()):
+            return None
+        with cache_path(cache_dir, files).open("rb") as stream:
+            if not trusted(fstat(stream.fileno())):
+                return None
+            cached_fingerprints, layers = load(stream)
+        if cached_fingerprints != fingerprints(files):
+            return None
+    except Exception:
+        # Missing, unreadable or corrupt caches are simply rebuilt
+        return None
+    return layers
+
+
+def write_cache(
+    cache_dir: Path,
+    files: dict[str, Path],
+    file_fingerprints: list[Fingerprint],
+    layers: Any,
+) -> None:
+    """
+    Store parsed layers with the fingerprints of the files they came from.
+    The file is replaced atomically, so concurrent writers and readers never
+    see a partial cache. Nothing is written to a directory that read_cache
+    would not trust.
+    """
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not trusted(cache_dir.stat()):
+        return
+    with atomic_writer(
+        cache_path(cache_dir, files), binary=True, mode=0o600
+    ) as stream:
+        dump((file_fingerprints, layers), stream, protocol=HIGHEST_PROTOCOL)
+
+
+def clear_cache(cache_dir: Path) -> int:
+    """
+    Delete every cache file in cache_dir, returning how many were removed.
+    """
+    if not cache_dir.is_dir():
+        return 0
+    count = 0
+    for path in cache_dir.glob(f"*{CACHE_SUFFIX}"):
+        path.unlink(missing_ok=True)
+        count += 1
+    return count
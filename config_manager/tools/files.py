@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from os import O_CREAT, O_EXCL, O_WRONLY, fdopen, fsync, open as os_open
+from os import fchmod, replace, urandom
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+
+@contextmanager
+def open_text(file: Path | IO[str]) -> Iterator[IO[str]]:
+    """
+    Open a path for reading line by line, or pass an already open stream
+    through without closing it.
+    """
+    if not isinstance(file, Path):
+        yield file
+        return
+    with file.open(newline="") as stream:
+        yield stream
+
+
+@contextmanager
+def open_output(file: Path | IO[str]) -> Iterator[IO[str]]:
+    """
+    Open a path for writing through atomic_writer, or pass an already open
+    stream through without closing it. Symlinks are written through rather
+    than replaced.
+    """
+    if not isinstance(file, Path):
+        yield file
+        return
+    with atomic_writer(file.resolve()) as stream:
+        yield stream
+
+
+def unique_outputs(
+    files: Iterable[tuple[Path, Path | None]],
+) -> list[tuple[Path, Path | None]]:
+    """
+    Drop (template_file, destination_file) pairs that repeat an earlier one,
+    comparing resolved paths (a template without a destination is written to
+    itself). Raises ValueError if two templates would be written to the same
+    file, or if one would be overwritten while it is read as a template.
+    """
+    unique = []
+    writers: dict[Path, Path] = {}
+    for template_file, destination_file in files:
+        template = template_file.resolve()
+        target = (destination_file or template_file).resolve()
+        if target in writers:
+            if writers[target] != template:
+                m = (
+                    f"{writers[target]} and {template} would both be written "
+                    f"to {target}"
+                )
+                raise ValueError(m)
+            continue
+        writers[target] = template
+        unique.append((template_file, destination_file))
+    for target, template in writers.items():
+        if target != template and target in writers.values():
+            m = f"{target} is both a template and the output of {template}"
+            raise ValueError(m)
+    return unique
+
+
+@contextmanager
+def atomic_writer(
+    path: Path, binary: bool = False, mode: int | None = None
+) -> Iterator[IO]:
+    """
+    Write to a temporary file next to path and move it into place once the
+    block finishes, so readers only ever see the old or the new contents.
+    Without a mode, a new file gets the permissions the umask allows and a
+    replaced file keeps its mode; with one, the file always gets that mode.
+    """
+    from shutil import copymode
+
+    while True:
+        temporary = path.with_name(f".{path.name}.{urandom(4).hex()}.tmp")
+        try:
+            # The kernel applies the umask to the 0o666 mode
+            fd = os_open(temporary, O_WRONLY | O_CREAT | O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        if mode is not None:
+            fchmod(fd, mode)
+        if binary:
+            stream = fdopen(fd, "wb")
+        else:
+            stream = fdopen(fd, "w", newline="")
+        with stream:
+            yield stream
+            stream.flush()
+            fsync(stream.fileno())
+        if mode is None and path.exists():
+            copymode(path, temporary)
+        replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for path while the block runs. The lock
+    is taken on a separate .lock file next to it, because atomic_writer
+    replaces path itself. Where fcntl is not available this does nothing.
+    """
+    try:
+        from fcntl import LOCK_EX, LOCK_UN, flock
+    except ImportError:
+        yield
+        return
+    with path.with_name(f".{path.name}.lock").open("a") as stream:
+        flock(stream.fileno(), LOCK_EX)
+        try:
+            yield
+        finally:
+            flock(stream.fileno(), LOCK_UN)
+
+
+def has_content(path: Path, content: bytes) -> bool:
+    """
+    Check whether the file at path holds exactly content, only reading it
+    when the size matches.
+    """
+    try:
+        if path.stat().st_size != len(content):
+            return False
+        return path.read_bytes() == content
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Hashable, Iterable
+
+from ..exceptions import InterpolationCycleError
+
+VISITING = 1
+DONE = 2
+
+
+def topological_order(
+    dependencies: dict[Hashable, Iterable[Hashable]],
+) -> list[Hashable]:
+    """
+    Order the keys of dependencies so that each comes after everything it
+    depends on. Raises InterpolationCycleError naming the paths of a cycle.
+    The graph is walked iteratively, so long chains of references cannot
+    exhaust the recursion limit.
+    """
+    order = []
+    state: dict[Hashable, int] = {}
+    for root in dependencies:
+        if root in state:
+            continue
+        state[root] = VISITING
+        stack = [(root, iter(dependencies[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state.get(child) == VISITING:
+                    cycle = [node for node, _ in stack]
+                    cycle = cycle[cycle.index(child) :] + [child]
+                    m = "Values reference each other in a cycle: " + (
+                        " -> ".join(format_path(path) for path in cycle)
+                    )
+                    raise InterpolationCycleError(m)
+                if child not in state:
+                    state[child] = VISITING
+                    stack.append((child, iter(dependencies.get(child, ()))))
+                    break
+            else:
+                stack.pop()
+                state[node] = DONE
+                order.append(node)
+    return order
+
+
+def format_path(path: Hashable) -> str:
+    if isinstance(path, tuple):
+        return "/".join(str(level) for level in path)
+    return str(path)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any
+
+from . import get_nested_value, merge_dictionaries
+
+MISSING = object()
+
+
+def find_in_layer(path: list, input: dict) -> Any:
+    """
+    Find path in a single layer, returning MISSING if the layer does not
+    define it. Lists are never merged, so a layer holding a list owns the rest
+    of the path.
+    """
+    node: Any = input
+    for index, level in enumerate(path):
+        if isinstance(node, list):
+            return get_nested_value(path=path[index:], input=node)
+        if not isinstance(node, dict):
+            raise KeyError(path)
+        if level not in node:
+            return MISSING
+        node = node[level]
+    return node
+
+
+def index_layer(
+    index: dict[tuple, int],
+    layers: list[dict],
+    position: int,
+    prefix: tuple,
+    node: dict,
+) -> None:
+    """
+    Record position as the owner of every path under prefix in node that no
+    higher layer already owns. Layers are indexed from the top down, so a
+    higher layer's leaf hides everything below it in lower layers.
+    """
+    for key, value in node.items():
+        path = (*prefix, key)
+        owner = index.get(path)
+        if owner is None:
+            index[path] = position
+        elif not isinstance(value, dict) or not isinstance(
+            find_in_layer(list(path), layers[owner]), dict
+        ):
+            continue
+        if isinstance(value, dict):
+            index_layer(index, layers, position, path, value)
+
+
+def find_dict_path(path: tuple, input: dict) -> Any:
+    """
+    Find path in a single layer through dictionaries only, the way the index
+    sees it, returning MISSING if it is not there.
+    """
+    node: Any = input
+    for level in path:
+        if not isinstance(node, dict) or level not in node:
+            return MISSING
+        node = node[level]
+    return node
+
+
+def collect_paths(paths: set[tuple], prefix: tuple, node: dict) -> None:
+    for key, value in node.items():
+        path = (*prefix, key)
+        paths.add(path)
+        if isinstance(value, dict):
+            collect_paths(paths, path, value)
+
+
+def flatten_into(flat: dict[tuple, Any], prefix: tuple, node: Any) -> None:
+    """
+    Record every value under prefix in node other than dictionaries by its
+    full path, with list indices as strings like parsed path strings have.
+    """
+    if isinstance(node, dict):
+        items = node.items()
+    else:
+        items = ((str(index), value) for index, value in enumerate(node))
+    for key, value in items:
+        path = (*prefix, key)
+        if not isinstance(value, dict):
+            flat[path] = value
+        if isinstance(value, (dict, list)):
+            flatten_into(flat, path, value)
+
+
+class Overlay:
+    """
+    A read-only view of configuration layers (such as the default, main and
+    deploy files), in order of increasing precedence. Dictionaries are merged
+    across layers and any other value in a higher layer replaces the lower
+    ones, exactly like merging the layers into one dictionary would, but
+    without copying them.
+
+    Every path defined by a layer above the lowest one is indexed with the
+    layer that provides it. Lookups go through the index and fall through to
+    the lowest layer, which is usually a large default configuration that is
+    never walked or copied. Layers are never modified; set returns a new
+    Overlay instead.
+
+    flatten optionally builds a flat index of every value in the merged view
+    other than dictionaries, turning their lookups into a single dict lookup.
+
+    set updates both indexes in place, touching only the paths along and
+    below the path being set, and hands them to the Overlay it returns.
+    Callers must serialize set calls (Config does so with its write_lock);
+    lookups still running on the previous Overlay see each value either
+    before or after the change.
+    """
+
+    def __init__(
+        self, layers: dict[str, dict], index: dict[tuple, int] | None = None
+    ):
+        self.layers = layers
+        self.names = list(layers)
+        self.data = list(layers.values())
+        if index is None:
+            index = {}
+            for position in range(len(self.data) - 1, 0, -1):
+                layer = self.data[position]
+                index_layer(index, self.data, position, (), layer)
+        self.index = index
+        self.merged: dict | None = None
+        self.flat: dict[tuple, Any] | None = None
+
+    def flatten(self) -> None:
+        merged: dict = {}
+        for layer in self.data:
+            merge_dictionaries(layer, merged)
+        self.flat = {}
+        flatten_into(self.flat, (), merged)
+
+    def find_raw(self, path: list) -> tuple[int, Any]:
+        """
+        Return the position of the layer providing path and its value there,
+        without merging dictionaries. Raises KeyError if no layer defines it.
+        """
+        key = tuple(path)
+        position = self.index.get(key)
+        if position is not None:
+            value = find_in_layer(path, self.data[position])
+            if value is not MISSING:
+                return position, value
+            return self.search_layers(path)
+        for end in range(len(path) - 1, 0, -1):
+            position = self.index.get(key[:end])
+            if position is None:
+                continue
+            value = find_in_layer(path[:end], self.data[position])
+            if value is MISSING:
+                return self.search_layers(path)
+            if isinstance(value, list):
+                # Lists are not merged, the layer owns the rest of the path
+                return position, get_nested_value(path[end:], value)
+            if not isinstance(value, dict):
+                raise KeyError(path)
+            break
+        if not self.data:
+            raise KeyError(path)
+        value = find_in_layer(path, self.data[0])
+        if value is MISSING:
+            raise KeyError(path)
+        return 0, value
+
+    def find(self, path: list) -> Any:
+        """
+        Return the merged value at path. Dictionaries are merged from the
+        layers defining them into a new dictionary, going down from the
+        layer that provides path until a layer holds something other than a
+        dictionary at or above it: a list or value there hides everything
+        below, just as it does in merge. Once merge has been kept, values
+        are read from the merged dictionary instead, so changes made to it
+        are seen.
+        """
+        if self.merged is not None:
+            return get_nested_value(path, self.merged) if path else self.merged
+        flat = self.flat
+        if flat is not None:
+            value = flat.get(tuple(path), MISSING)
+            if value is not MISSING:
+                return value
+        if not path:
+            return self.merge()
+        position, value = self.find_raw(path)
+        if not isinstance(value, dict):
+            return value
+        nodes = [value]
+        # A dictionary reached through a list belongs to that layer alone
+        if find_dict_path(tuple(path), self.data[position]) is value:
+            for layer in reversed(self.data[:position]):
+                node: Any = layer
+                for level in path:
+                    if not isinstance(node, dict):
+                        break
+                    node = node.get(level, MISSING)
+                if node is MISSING:
+                    continue
+                if not isinstance(node, dict):
+                    break
+                nodes.append(node)
+        output: dict = {}
+        for node in reversed(nodes):
+            merge_dictionaries(node, output)
+        return output
+
+    def search_layers(self, path: list) -> tuple[int, Any]:
+        """
+        Find path by searching every layer from the top down, for lookups
+        on an Overlay whose index set has since updated for a newer one.
+        """
+        for position in range(len(self.data) - 1, -1, -1):
+            value = find_in_layer(path, self.data[position])
+            if value is not MISSING:
+                return position, value
+        raise KeyError(path)
+
+    def source_of(self, path: list) -> str:
+        """
+        Return the name of the layer that provides the value at path.
+        """
+        return self.names[self.find_raw(path)[0]]
+
+    def merge(self, keep: bool = True) -> dict:
+        """
+        Return every layer merged into one dictionary. Unless keep is False,
+        the dictionary is kept and returned from then on, and find reads
+        from it (see Config.entries).
+        """
+        if self.merged is not None:
+            return self.merged
+        merged: dict = {}
+        for layer in self.data:
+            merge_dictionaries(layer, merged)
+        if keep:
+            self.merged = merged
+        return merged
+
+    def set(
+        self,
+        name: str,
+        path: list,
+        value: Any,
+        create_path: bool = False,
+    ) -> Overlay:
+        """
+        Return a new Overlay in which layer name holds value at path. Only
+        the dictionaries and lists along path are copied. Unless create_path
+        is set, the parent of path must already exist in the merged view.
+        """
+        if not create_path and len(path) > 1:
+            self.find_raw(path[:-1])
+        layers = dict(self.layers)
+        layers[name] = self.assign(layers.get(name, {}), path, 0, value)
+        stale: dict[tuple, Any] = {}
+        if self.flat is not None:
+            try:
+                flatten_into(stale, path[:-1], {path[-1]: self.find(path)})
+            except (KeyError, IndexError, ValueError):
+                pass
+        previous = None
+        if name in self.layers:
+            overlay = Overlay(layers, index=self.index)
+            position = self.names.index(name)
+            previous = self.update_index(overlay, tuple(path), position)
+        if previous is None:
+            # A new layer on top changes every position, index it afresh
+            overlay = Overlay(layers)
+        try:
+            if self.flat is not None:
+                overlay.flat = self.update_flat(overlay, tuple(path), stale)
+        except BaseException:
+            for key, owner in (previous or {}).items():
+                if owner is None:
+                    self.index.pop(key, None)
+                else:
+                    self.index[key] = owner
+            raise
+        return overlay
+
+    def update_index(
+        self, overlay: Overlay, path: tuple, position: int
+    ) -> dict[tuple, int | None] | None:
+        """
+        Update the shared index in place for overlay, in which the layer at
+        position changed at path. Returns the previous owner of every path
+        it changed, or None if the change reaches beyond path and the index
+        has to be built again.
+        """
+        if position == 0:
+            # The lowest layer is never indexed
+            return {}
+        updates: dict[tuple, int] = {}
+        node: Any = overlay.data[position]
+        for end in range(1, len(path)):
+            key = path[:end]
+            node = node[path[end - 1]]
+            owner = self.index.get(key)
+            owned = MISSING
+            if owner is not None and owner != position:
+                owned = find_in_layer(list(key), self.data[owner])
+            if owner is not None and owner > position:
+                if not isinstance(owned, dict) or not isinstance(node, dict):
+                    # Hidden below a higher layer's value, or in a list
+                    return self.apply_index(updates, set())
+                continue
+            if owned is not MISSING and not isinstance(owned, dict):
+                if isinstance(node, dict):
+                    # A lower layer's value is replaced by a dictionary,
+                    # exposing everything below it in the layers underneath
+                    return None
+            updates[key] = position
+            if not isinstance(node, dict):
+                # Lists are not merged, so nothing below is indexed
+                return self.apply_index(updates, set())
+        stale: set[tuple] = set()
+        for layer in self.data[1:]:
+            old = find_dict_path(path, layer)
+            if old is not MISSING:
+                stale.add(path)
+                if isinstance(old, dict):
+                    collect_paths(stale, path, old)
+        fresh: dict[tuple, int] = {}
+        for owner in range(len(overlay.data) - 1, 0, -1):
+            new = find_dict_path(path, overlay.data[owner])
+            if new is not MISSING:
+                index_layer(
+                    fresh, overlay.data, owner, path[:-1], {path[-1]: new}
+                )
+        updates.update(fresh)
+        return self.apply_index(updates, stale - fresh.keys())
+
+    def apply_index(
+        self, updates: dict[tuple, int], removed: set[tuple]
+    ) -> dict[tuple, int | None]:
+        previous = {
+            key: self.index.get(key) for key in chain(updates, removed)
+        }
+        self.index.update(updates)
+        for key in removed:
+            self.index.pop(key, None)
+        return previous
+
+    def update_flat(
+        self, overlay: Overlay, path: tuple, stale: dict[tuple, Any]
+    ) -> dict[tuple, Any]:
+        """
+        Update the flat index in place for overlay: the entries at and below
+        path, and the lists holding it. stale holds the entries that were at
+        and below path before. New values are stored before stale entries
+        are removed, so concurrent lookups never miss a value.
+        """
+        flat = self.flat if self.flat is not None else {}
+        fresh: dict[tuple, Any] = {}
+        flatten_into(fresh, path[:-1], {path[-1]: overlay.find(path)})
+        for end in range(1, len(path)):
+            if path[:end] in flat:
+                fresh[path[:end]] = overlay.find(path[:end])
+        flat.update(fresh)
+        for key in stale.keys() - fresh.keys():
+            flat.pop(key, None)
+        return flat
+
+    def assign(
+        self, node: dict | list, path: list, depth: int, value: Any
+    ) -> dict | list:
+        node = node.copy()
+        key: Any = path[depth]
+        if isinstance(node, list):
+            key = int(key)
+        if depth == len(path) - 1:
+            node[key] = value
+            return node
+        if isinstance(node, list) or key in node:
+            child = node[key]
+        else:
+            # Start this layer's copy of the path, taking over a list that a
+            # lower layer provides there
+            try:
+                child = self.find_raw(path[: depth + 1])[1]
+            except (KeyError, IndexError, ValueError):
+                child = {}
+            child = child if isinstance(child, list) else {}
+        if not isinstance(child, (dict, list)):
+            m = (
+                f"Cannot traverse path {path}: encountered value {child} "
+                "instead of dict or list"
+            )
+            raise ValueError(m)
+        node[key] = self.assign(child, path, depth + 1, value)
+        return node
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from re import compile as compile_pattern
+from stat import S_ISREG
+from typing import Awaitable, Callable, Iterable
+
+from ..settings import TEMPLATE_CACHE_SIZE, TEMPLATE_FILE_CACHE_SIZE
+from .files import open_text
+
+
+class Template:
+    """
+    A string value split into literal segments and (plugin, argument)
+    references. Literals always has exactly one more item than references, so
+    rendering is a single join of the two interleaved.
+    """
+
+    __slots__ = ("literals", "references")
+
+    def __init__(
+        self,
+        literals: tuple[str, ...],
+        references: tuple[tuple[str, str], ...],
+    ):
+        self.literals = literals
+        self.references = references
+
+    def render(self, resolve: Callable[[str, str], str]) -> str:
+        """
+        Render the template, calling resolve(plugin, argument) once for each
+        distinct reference.
+        """
+        if not self.references:
+            return self.literals[0]
+        results: dict[tuple[str, str], str] = {}
+        for reference in self.references:
+            if reference not in results:
+                results[reference] = resolve(*reference)
+        return self.join(results)
+
+    async def arender(
+        self,
+        resolve: Callable[[str, str], Awaitable[str]],
+    ) -> str:
+        """
+        Render the template, awaiting resolve(plugin, argument) concurrently
+        for each distinct reference.
+        """
+        from asyncio import gather
+
+        if not self.references:
+            return self.literals[0]
+        unique = list(dict.fromkeys(self.references))
+        values = await gather(*(resolve(*reference) for reference in unique))
+        return self.join(dict(zip(unique, values)))
+
+    def join(self, results: dict[tuple[str, str], str]) -> str:
+        """
+        Join the literal segments with already resolved references.
+        """
+        parts = [self.literals[0]]
+        for reference, literal in zip(self.references, self.literals[1:]):
+            parts.append(results[reference])
+            parts.append(literal)
+        return "".join(parts)
+
+
+def parse_template(pattern: str, value: str) -> Template:
+    """
+    Split a value into a Template without caching it. Used for one-off text
+    such as the lines of a template file, which would only crowd config values
+    out of the template cache.
+    """
+    literals: list[str] = []
+    references: list[tuple[str, str]] = []
+    position = 0
+    for entry in _compile_pattern(pattern).finditer(value):
+        literals.append(value[position : entry.start()])
+        references.append((entry.group(1), entry.group(2)))
+        position = entry.end()
+    literals.append(value[position:])
+    return Template(tuple(literals), tuple(references))
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(pattern: str, value: str) -> Template:
+    """
+    Compile a value into a Template. Results are cached by (pattern, value) so
+    each distinct string is only scanned once.
+    """
+    return parse_template(pattern, value)
+
+
+def compile_file(pattern: str, path: Path) -> tuple[Template, ...]:
+    """
+    Compile a template file into one Template per line (references never
+    span lines), reading it only once. Regular files are cached by path,
+    inode, modification time and size, so an unchanged file is not read
+    again.
+    """
+    stat = path.stat()
+    if not S_ISREG(stat.st_mode):
+        return read_file(pattern, path)
+    state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    return _compile_file(pattern, path.resolve(), state)
+
+
+def read_file(pattern: str, path: Path) -> tuple[Template, ...]:
+    with open_text(path) as source:
+        return tuple(parse_template(pattern, line) for line in source)
+
+
+@lru_cache(maxsize=TEMPLATE_FILE_CACHE_SIZE)
+def _compile_file(
+    pattern: str, path: Path, state: tuple[int, int, int]
+) -> tuple[Template, ...]:
+    return read_file(pattern, path)
+
+
+def group_references(templates: Iterable[Template]) -> dict[str, list[str]]:
+    """
+    Group the distinct reference arguments of templates by plugin name.
+    """
+    output: dict[str, dict[str, None]] = {}
+    for template in templates:
+        for plugin, argument in template.references:
+            output.setdefault(plugin, {})[argument] = None
+    return {plugin: list(arguments) for plugin, arguments in output.items()}
+
+
+def collect_references(
+    pattern: str,
+    values: Iterable[str],
+    cache: bool = True,
+) -> dict[str, list[str]]:
+    """
+    Group the distinct reference arguments found in values by plugin name.
+    """
+    parse = compile_template if cache else parse_template
+    return group_references(parse(pattern, value) for value in values)
+
+
+@lru_cache(maxsize=32)
+def _compile_pattern(pattern: str):
+    return compile_pattern(pattern)
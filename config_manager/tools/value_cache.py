@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from threading import Lock, local
+from typing import Any, Callable
+
+
+class Resolution:
+    """
+    Bookkeeping for one path while it is being resolved: every path it read
+    and whether any of its references came from a non-cacheable plugin.
+    """
+
+    __slots__ = ("dependencies", "volatile")
+
+    def __init__(self, path: tuple[str, ...]):
+        self.dependencies: set[tuple[str, ...]] = {path}
+        self.volatile = False
+
+
+class ValueCache:
+    """
+    Cache of fully resolved values keyed by path. Each entry remembers the
+    paths it was derived from, so setting a path only drops the entries that
+    depend on it (or on a parent or child of it).
+
+    Cached values are read without locking. Every thread has its own stack of
+    paths being resolved, and a value is only stored if nothing was
+    invalidated while it was being resolved, so a value resolved from an old
+    snapshot of the config never replaces a newer one.
+    """
+
+    def __init__(self):
+        self.values: dict[tuple[str, ...], tuple[Any, frozenset]] = {}
+        self.dependents: dict[tuple[str, ...], set[tuple[str, ...]]] = {}
+        self.generation = 0
+        self.lock = Lock()
+        self.local = local()
+
+    @property
+    def stack(self) -> list[Resolution]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, path: tuple[str, ...]) -> bool:
+        return path in self.values
+
+    def get(self, path: tuple[str, ...], resolve: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for path, or call resolve() and cache its
+        result along with the paths it read.
+        """
+        stack = self.stack
+        parent = stack[-1] if stack else None
+        cached = self.values.get(path)
+        if cached is not None:
+            value, dependencies = cached
+            if parent is not None:
+                parent.dependencies |= dependencies
+            return value
+        generation = self.generation
+        frame = Resolution(path)
+        stack.append(frame)
+        try:
+            value = resolve()
+        finally:
+            stack.pop()
+        if parent is not None:
+            parent.dependencies |= frame.dependencies
+            parent.volatile = parent.volatile or frame.volatile
+        if not frame.volatile:
+            self.store(path, value, frozenset(frame.dependencies), generation)
+        return value
+
+    def store(
+        self,
+        path: tuple[str, ...],
+        value: Any,
+        dependencies: frozenset,
+        generation: int | None = None,
+    ) -> None:
+        """
+        Cache value for path, unless the cache was invalidated since
+        generation (when resolution of the value started).
+        """
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.values[path] = (value, dependencies)
+            for dependency in dependencies:
+                self.dependents.setdefault(dependency, set()).add(path)
+
+    def mark_volatile(self) -> None:
+        """
+        Prevent the value currently being resolved from being cached.
+        """
+        if self.stack:
+            self.stack[-1].volatile = True
+
+    def invalidate(self, path: tuple[str, ...]) -> None:
+        """
+        Drop every cached value that depends on path, its parents or children.
+        """
+        with self.lock:
+            self.generation += 1
+            overlapping = [
+                dependency
+                for dependency in self.dependents
+                if dependency[: len(path)] == path
+                or path[: len(dependency)] == dependency
+            ]
+            for dependency in overlapping:
+                for dependent in self.dependents.pop(dependency, ()):
+                    self.values.pop(dependent, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.values.clear()
+            self.dependents.clear()
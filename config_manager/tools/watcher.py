@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from select import select
+from threading import Event, Thread, current_thread
+from typing import Callable, Iterable
+
+# inotify(7) event and flag values from <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+
+FileState = tuple[int, int, int] | None
+
+
+def file_state(path: Path) -> FileState:
+    """
+    Identify the current version of a file (following symlinks) by inode,
+    modification time and size, or None if it does not exist.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def open_inotify(directories: Iterable[Path]) -> int | None:
+    """
+    Return a non-blocking inotify file descriptor watching directories, or
+    None if inotify is not available. Directories are watched rather than
+    files so that files replaced by a rename are still noticed.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        from ctypes import CDLL
+        from ctypes.util import find_library
+
+        libc = CDLL(find_library("c"), use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        return None
+    for directory in directories:
+        if inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+    return fd
+
+
+class FileWatcher:
+    """
+    Watch files from a background thread and call callback with the set of
+    files that changed. Changes are detected by comparing file_state, woken
+    by inotify where available and by polling every interval seconds
+    otherwise. A burst of writes is reported once, after the files have been
+    quiet for debounce seconds. Changes are reported relative to states when
+    it is given (such as the states recorded when the files were read),
+    otherwise relative to the files as they are when the watcher is created.
+    """
+
+    def __init__(
+        self,
+        files: list[Path],
+        callback: Callable[[set[Path]], None],
+        debounce: float = 0.2,
+        interval: float = 1.0,
+        states: dict[Path, FileState] | None = None,
+    ):
+        self.files = files
+        self.callback = callback
+        self.debounce = debounce
+        self.interval = interval
+        self.states = self.snapshot() if states is None else dict(states)
+        self.stopped = Event()
+        self.wake_read, self.wake_write = os.pipe()
+        directories = {path.absolute().parent for path in files}
+        directories |= {path.resolve().parent for path in files}
+        self.inotify = open_inotify(directories)
+        self.thread = Thread(target=self.run, name="config-watcher")
+        self.thread.daemon = True
+
+    def snapshot(self) -> dict[Path, FileState]:
+        return {path: file_state(path) for path in self.files}
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        os.write(self.wake_write, b"\0")
+        if self.thread.is_alive() and self.thread is not current_thread():
+            self.thread.join()
+        for fd in (self.inotify, self.wake_read, self.wake_write):
+            if fd is not None:
+                os.close(fd)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleep for up to timeout seconds, returning True early if inotify
+        reported activity in one of the watched directories.
+        """
+        if self.inotify is None:
+            self.stopped.wait(timeout)
+            return False
+        ready, _, _ = select([self.inotify, self.wake_read], [], [], timeout)
+        if self.inotify not in ready:
+            return False
+        try:
+            while os.read(self.inotify, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            self.wait(self.interval)
+            states = self.snapshot()
+            if states == self.states:
+                continue
+            while not self.stopped.is_set():
+                activity = self.wait(self.debounce)
+                latest = self.snapshot()
+                if not activity and latest == states:
+                    break
+                states = latest
+            if self.stopped.is_set():
+                return
+            changed = {
+                path
+                for path in self.files
+                if states[path] != self.states[path]
+            }
+            self.states = states
+            if changed:
+                self.callback(changed)
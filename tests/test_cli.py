@@ -0,0 +1,172 @@
+import json
+from pathlib import Path
+from click.testing import CliRunner
+from config_manager import Config
+from config_manager.cli import cli
+
+CWD = Path(__file__).parent
+DATA_DIRECTORY = CWD / "data"
+CONFIG_FILE = str(DATA_DIRECTORY / "config.yaml")
+
+
+def test_build_many(tmp_path: Path):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.tmpl").write_text(
+            f"{name} ${{var:test_group/str}} ${{var:test_group/int}}\n"
+        )
+    (tmp_path / "manifest.json").write_text('{"templates": {"a.tmpl": "a"}}')
+    (tmp_path / "out").mkdir()
+    result = CliRunner().invoke(
+        cli,
+        [
+            "build",
+            "-c",
+            CONFIG_FILE,
+            "--manifest",
+            str(tmp_path / "manifest.json"),
+            "--glob",
+            str(tmp_path / "*.tmpl"),
+            "--output-dir",
+            str(tmp_path / "out"),
+            "--template",
+            str(tmp_path / "c.tmpl"),
+            "--output",
+            str(tmp_path / "c"),
+            "--workers",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "a").read_text() == "a abc 123\n"
+    assert (tmp_path / "c").read_text() == "c abc 123\n"
+    assert (tmp_path / "out" / "b.tmpl").read_text() == "b abc 123\n"
+    assert "total (5 templates)" in result.stderr
+
+
+def test_build_outputs(tmp_path: Path):
+    for directory in ["a", "b", "out"]:
+        (tmp_path / directory).mkdir()
+        template = tmp_path / directory / "x.tmpl"
+        template.write_text("${var:test_group/str}\n")
+    build = ["build", "-c", CONFIG_FILE, "--output-dir", str(tmp_path / "out")]
+    result = CliRunner().invoke(
+        cli,
+        build
+        + ["--glob", str(tmp_path / "a" / "*.tmpl")]
+        + ["--glob", str(tmp_path / "b" / "*.tmpl")],
+    )
+    assert result.exit_code != 0
+    assert "would both be written to" in result.output
+    assert (tmp_path / "out" / "x.tmpl").read_text().startswith("${var:")
+    # The same template and output given twice are rendered once
+    template = str(tmp_path / "a" / "x.tmpl")
+    result = CliRunner().invoke(
+        cli, build + ["--glob", template, "--glob", template]
+    )
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "out" / "x.tmpl").read_text() == "abc\n"
+
+
+def test_build_stdin():
+    result = CliRunner().invoke(
+        cli,
+        ["build", "-c", CONFIG_FILE, "--template", "-"],
+        input="${var:test_group/float}\n",
+    )
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "3.14\n"
+
+
+def test_get_many():
+    args = ["get", "-c", CONFIG_FILE, "test_group/str", "test_group/int"]
+    result = CliRunner().invoke(cli, args)
+    assert result.stdout == "abc\n123\n"
+    result = CliRunner().invoke(cli, args + ["--format", "nul"])
+    assert result.stdout == "abc\x00123\x00"
+    result = CliRunner().invoke(cli, args + ["--format", "json"])
+    assert json.loads(result.stdout) == {
+        "test_group/str": "abc",
+        "test_group/int": 123,
+    }
+    result = CliRunner().invoke(
+        cli,
+        ["get", "-c", CONFIG_FILE, "--stdin", "--format", "shell"],
+        input="test_group/str\ntest_group/float\n",
+    )
+    assert result.stdout == "TEST_GROUP_STR=abc\nTEST_GROUP_FLOAT=3.14\n"
+    result = CliRunner().invoke(cli, args + ["--concurrent"])
+    assert result.stdout == "abc\n123\n"
+
+
+def test_export_requires_config():
+    result = CliRunner().invoke(cli, ["export"])
+    assert result.exit_code == 2
+    assert "--config-file" in result.output
+
+
+def test_build_requires_config(tmp_path: Path):
+    (tmp_path / "t.tmpl").write_text("${var:a/b}\n")
+    result = CliRunner().invoke(
+        cli,
+        ["build", "--template", str(tmp_path / "t.tmpl")],
+    )
+    assert result.exit_code == 2
+    assert "--config-file" in result.output
+
+
+def test_export_compact():
+    args = ["export", "-c", CONFIG_FILE]
+    result = CliRunner().invoke(cli, args)
+    compact = CliRunner().invoke(cli, args + ["--compact"])
+    assert json.loads(result.stdout) == json.loads(compact.stdout)
+    assert "\n" not in compact.stdout.strip()
+
+
+def test_convert(tmp_path: Path):
+    result = CliRunner().invoke(
+        cli, ["convert", CONFIG_FILE, str(tmp_path / "config.json")]
+    )
+    assert result.exit_code == 0, result.output
+    converted = json.loads((tmp_path / "config.json").read_text())
+    assert converted == Config(config_file=Path(CONFIG_FILE)).entries
+
+
+def test_export_resolved(tmp_path: Path):
+    (tmp_path / "config.json").write_text(
+        '{"a": "x", "b": "${var:a}y", "c": ["${var:b}z"]}'
+    )
+    result = CliRunner().invoke(
+        cli, ["export", "-c", str(tmp_path / "config.json"), "--resolved"]
+    )
+    assert json.loads(result.stdout) == {"a": "x", "b": "xy", "c": ["xyz"]}
+
+
+def test_export_prefix_and_lines(tmp_path: Path):
+    (tmp_path / "config.json").write_text(
+        '{"a": {"b": 1, "c": {"d": [1, 2], "e": {}}}, "f": "g"}'
+    )
+    args = ["export", "-c", str(tmp_path / "config.json")]
+    result = CliRunner().invoke(cli, args + ["--prefix", "a/c"])
+    assert json.loads(result.stdout) == {"d": [1, 2], "e": {}}
+    result = CliRunner().invoke(cli, args + ["--format", "jsonl"])
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        ["a/b", 1],
+        ["a/c/d", [1, 2]],
+        ["a/c/e", {}],
+        ["f", "g"],
+    ]
+    result = CliRunner().invoke(cli, args + ["--prefix", "a/x"])
+    assert result.exit_code != 0
+
+
+def test_export_output(tmp_path: Path):
+    result = CliRunner().invoke(
+        cli,
+        ["export", "-c", CONFIG_FILE, "--output", str(tmp_path / "out.json")],
+    )
+    assert result.exit_code == 0, result.output
+    assert result.stdout == ""
+    from config_manager.tools.codec import dump_json
+
+    expected = dump_json(Config(config_file=Path(CONFIG_FILE)).entries)
+    assert (tmp_path / "out.json").read_text() == expected + "\n"
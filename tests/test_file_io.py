@@ -1,6 +1,10 @@
+from asyncio import run
+from io import StringIO
 from pytest import raises
 from pathlib import Path
-from config_manager import Config
+from click.testing import CliRunner
+from config_manager import Config, methods
+from config_manager.cli import cli
 from config_manager.exceptions import NotConfiguredError
 
 CWD = Path(__file__).parent
@@ -131,3 +135,162 @@ def test_interpolate_file():
     output_file.unlink(missing_ok=True)
     config.interpolate_file(template_file, output_file)
     output_file.unlink(missing_ok=True)
+
+
+def test_interpolate_file_streams():
+    config = Config(
+        config_file=DATA_DIRECTORY / "test_interpolate_file_config.yaml"
+    )
+    template = StringIO("a: ${var:test_group/str}\r\nb: ${var:test_group/int}")
+    output = StringIO()
+    config.interpolate_file(template, output)
+    assert output.getvalue() == "a: abc\r\nb: 123"
+    with raises(ValueError):
+        config.interpolate_file(StringIO(""))
+
+
+def test_interpolate_file_in_place():
+    config = Config(
+        config_file=DATA_DIRECTORY / "test_interpolate_file_config.yaml"
+    )
+    template_file = DATA_DIRECTORY / "output_in_place.md"
+    template_file.write_text("${var:test_group/float}\n")
+    try:
+        config.interpolate_file(template_file)
+        assert template_file.read_text() == "3.14\n"
+        run(config.ainterpolate_file(template_file))
+        assert template_file.read_text() == "3.14\n"
+    finally:
+        template_file.unlink(missing_ok=True)
+
+
+def test_interpolate_file_through_symlink(tmp_path: Path):
+    config = Config(entries={"a": "b"})
+    target = tmp_path / "template.txt"
+    target.write_text("${var:a}\n")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+    config.interpolate_file(link)
+    assert link.is_symlink()
+    assert target.read_text() == "b\n"
+
+
+def test_interpolate_file_reads_once(tmp_path: Path, monkeypatch):
+    from config_manager.tools import template as template_module
+
+    opened = []
+    open_text = template_module.open_text
+
+    def counting_open_text(path: Path):
+        opened.append(path)
+        return open_text(path)
+
+    monkeypatch.setattr(template_module, "open_text", counting_open_text)
+    config = Config(entries={"a": "b"})
+    template = tmp_path / "template.txt"
+    template.write_text("${var:a} ${var:a}\n")
+    config.interpolate_file(template, tmp_path / "output.txt")
+    assert (tmp_path / "output.txt").read_text() == "b b\n"
+    assert len(opened) == 1
+    # Unchanged templates come from the cache, changed ones are read again
+    run(config.ainterpolate_file(template, tmp_path / "output.txt"))
+    assert len(opened) == 1
+    template.write_text("[${var:a}]\n")
+    config.interpolate_file(template, tmp_path / "output.txt")
+    assert (tmp_path / "output.txt").read_text() == "[b]\n"
+    assert len(opened) == 2
+
+
+def test_new_file_mode(tmp_path: Path):
+    from os import umask
+
+    previous = umask(0o027)
+    try:
+        Config(entries={"a": "b"}).interpolate_file(
+            StringIO("${var:a}"), tmp_path / "output.txt"
+        )
+    finally:
+        umask(previous)
+    assert (tmp_path / "output.txt").stat().st_mode & 0o777 == 0o640
+
+
+def test_lazy_load():
+    main_config = DATA_DIRECTORY / "test_load_main_with_default-main.ini"
+    default_config = DATA_DIRECTORY / (
+        "test_load_main_with_default-default.yaml"
+    )
+    config = Config(
+        config_file=main_config,
+        default_config=default_config,
+        lazy=True,
+    )
+    assert not config.loaded and config.layers == {}
+    assert config.get_str(["group_1", "config_name"]) == "main"
+    assert list(config.layers) == ["config_file"]
+    assert not config.loaded
+    assert config.get_dict(["group_1"])["config_name"] == "main"
+    assert config.loaded and config.layers == {}
+
+
+def test_disk_cache(tmp_path: Path, monkeypatch):
+    main_config = tmp_path / "config.json"
+    main_config.write_text('{"group_1": {"config_name": "main"}}')
+    config = Config(config_file=main_config, cache_dir=tmp_path / "cache")
+    (cache_file,) = (tmp_path / "cache").iterdir()
+    assert cache_file.stat().st_mode & 0o777 == 0o600
+
+    def fail(path: Path):
+        raise AssertionError(f"{path} parsed despite the cache")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(methods, "load_file", fail)
+        cached = Config(config_file=main_config, cache_dir=tmp_path / "cache")
+        assert cached.get_str("group_1/config_name") == "main"
+        assert cached.entries == config.entries
+        # Caches others could have written are never unpickled
+        cache_file.chmod(0o620)
+        with raises(AssertionError):
+            Config(config_file=main_config, cache_dir=tmp_path / "cache")
+        cache_file.chmod(0o600)
+        (tmp_path / "cache").chmod(0o777)
+        with raises(AssertionError):
+            Config(config_file=main_config, cache_dir=tmp_path / "cache")
+    (tmp_path / "cache").chmod(0o700)
+    main_config.write_text('{"group_1": {"config_name": "changed"}}')
+    changed = Config(config_file=main_config, cache_dir=tmp_path / "cache")
+    assert changed.get_str("group_1/config_name") == "changed"
+    result = CliRunner().invoke(
+        cli, ["clear-cache", "--cache-dir", str(tmp_path / "cache")]
+    )
+    assert result.exit_code == 0
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_storage_aliases(tmp_path: Path):
+    config = Config()
+    config.set(path=["group", "key"], value="value", create_path=True)
+    for name in ["config.yml", "config.cfg"]:
+        config.config_file = tmp_path / name
+        config.save()
+        assert Config(tmp_path / name).get("group/key") == "value"
+    with raises(NotImplementedError):
+        Config(tmp_path / "config.unknown").load()
+
+
+def test_save_only_when_changed(tmp_path: Path):
+    target = tmp_path / "real.json"
+    target.write_text('{"group": {"key": "old"}}')
+    link = tmp_path / "config.json"
+    link.symlink_to(target)
+    config = Config(config_file=link, lock_saves=True)
+    inode = target.stat().st_ino
+    assert config.save()
+    assert link.is_symlink()
+    assert target.stat().st_ino != inode
+    inode = target.stat().st_ino
+    assert not config.save()
+    assert target.stat().st_ino == inode
+    config.set("group/key", "new")
+    assert config.save()
+    assert Config(config_file=link).get("group/key") == "new"
+    assert not list(tmp_path.glob("*.tmp"))
@@ -1,5 +1,6 @@
 from pathlib import Path
 from config_manager import Config
+from config_manager.storage import ini
 from pytest import raises
 
 CWD = Path(__file__).parent
@@ -76,3 +77,33 @@ def test_get_dict():
 def test_get_list():
     with raises(ValueError):
         config.get_list(["test_group", "str"])
+
+
+def test_parse():
+    text = (
+        "; comment\n"
+        "[group]\n"
+        "  key = a=b  \n"
+        "url=http://host/?x=1\n"
+        "no separator\n"
+        "two words = skipped\n"
+        "\n"
+        "[other]\n"
+        "empty =\n"
+        "[group]\n"
+        "more = 1\n"
+    )
+    assert ini.loads(text) == {
+        "group": {"key": "a=b", "url": "http://host/?x=1", "more": "1"},
+        "other": {"empty": ""},
+    }
+    with raises(ValueError):
+        ini.loads("key = value\n")
+
+
+def test_round_trip(tmp_path: Path):
+    data = {"group": {"str": "abc", "list": [1, 2], "bool": True}}
+    ini.save(tmp_path / "config.ini", data)
+    assert ini.load(tmp_path / "config.ini") == {
+        "group": {"str": "abc", "list": "[1, 2]", "bool": "true"}
+    }
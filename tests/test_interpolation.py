@@ -0,0 +1,86 @@
+from pytest import raises
+from config_manager import Config
+from config_manager.exceptions import InterpolationCycleError
+from config_manager.plugins import register_plugin
+from config_manager.settings import DEFAULT_INTERPOLATION_PATTERN
+from config_manager.tools.template import compile_template
+
+
+def test_compile_template():
+    template = compile_template(
+        DEFAULT_INTERPOLATION_PATTERN, "a-${var:x/y}-b-${vault:kv/z}"
+    )
+    assert template.literals == ("a-", "-b-", "")
+    assert template.references == (("var", "x/y"), ("vault", "kv/z"))
+    plain = compile_template(DEFAULT_INTERPOLATION_PATTERN, "plain")
+    assert plain.references == ()
+
+
+def test_compile_template_is_cached():
+    value = "${var:cached/value}"
+    first = compile_template(DEFAULT_INTERPOLATION_PATTERN, value)
+    assert compile_template(DEFAULT_INTERPOLATION_PATTERN, value) is first
+
+
+def test_interpolate_repeated_reference():
+    config = Config(entries={"host": "db", "port": 5432})
+    value = "${var:host}:${var:port}/${var:host}"
+    assert config.interpolate(value) == "db:5432/db"
+    assert config.interpolate(value) == "db:5432/db"
+
+
+def test_value_cache_invalidation():
+    config = Config(
+        entries={
+            "db": {"host": "db", "port": 5432, "name": "app"},
+            "url": "${var:db/host}:${var:db/port}",
+            "dsn": "postgres://${var:url}/${var:db/name}",
+            "other": "${var:db/name}",
+        },
+        cache_values=True,
+    )
+    assert config.get_str("dsn") == "postgres://db:5432/app"
+    assert config.get_str("other") == "app"
+    assert ("dsn",) in config.value_cache
+    config.set("db/port", 6543)
+    assert ("dsn",) not in config.value_cache
+    assert ("url",) not in config.value_cache
+    assert ("other",) in config.value_cache
+    assert config.get_str("dsn") == "postgres://db:6543/app"
+    config.set("db", {"host": "replica", "port": 1, "name": "app"})
+    assert config.get_str("url") == "replica:1"
+
+
+def test_register_plugin():
+    register_plugin("upper", lambda config, value: value.upper())
+    config = Config(entries={"name": "${upper:abc}"})
+    assert config.get("name") == "ABC"
+    with raises(NotImplementedError):
+        config.interpolate("${missing:abc}")
+
+
+def test_resolve_all():
+    config = Config(
+        entries={
+            "db": {"host": "db", "port": 5432},
+            "url": "${var:db/host}:${var:db/port}",
+            "urls": ["http://${var:url}/a", "${var:urls/0}b"],
+            "nested": {"deep": "${var:urls/1}!"},
+        }
+    )
+    resolved = config.resolve_all()
+    assert resolved == {
+        "db": {"host": "db", "port": 5432},
+        "url": "db:5432",
+        "urls": ["http://db:5432/a", "http://db:5432/ab"],
+        "nested": {"deep": "http://db:5432/ab!"},
+    }
+    assert config.entries["url"] == "${var:db/host}:${var:db/port}"
+
+
+def test_resolve_all_cycle():
+    config = Config(
+        entries={"a": "${var:b}", "b": "x${var:c}", "c": "${var:a}"}
+    )
+    with raises(InterpolationCycleError, match="a -> b -> c -> a"):
+        config.resolve_all()
@@ -1,5 +1,7 @@
 from pathlib import Path
 from config_manager import Config
+from config_manager.tools import codec
+from config_manager.tools.codec import dump_json, iter_json, load_json
 from pytest import raises
 
 CWD = Path(__file__).parent
@@ -90,3 +92,48 @@ def test_get_list():
         config.get_list(["_", "_"])
     with raises(KeyError):
         config.get_list(["test_group", "_"])
+
+
+def test_get_str_compact():
+    assert config.get_str(["array_group"], compact=True) == '["abc",123,true]'
+    assert config.get_str(["array_group"]) == '[\n  "abc",\n  123,\n  true\n]'
+
+
+def test_codec_fallback(monkeypatch):
+    value = {"a": [1, 2.5, None, "é"], 1: {"b": True}, "big": 2**70}
+    outputs = [dump_json(value), dump_json(value, compact=True)]
+    monkeypatch.setattr(codec, "orjson", None)
+    assert [dump_json(value), dump_json(value, compact=True)] == outputs
+    assert load_json(outputs[0]) == load_json(outputs[1].encode())
+    assert dump_json("é") == '"\\u00e9"'
+
+
+def test_non_finite_round_trip(tmp_path: Path):
+    (tmp_path / "config.json").write_text('{"limits": {"ratio": 0.5}}')
+    (tmp_path / "deploy.json").write_text(
+        '{"limits": {"ratio": NaN, "max": Infinity, "min": -Infinity}}'
+    )
+    # Loading with a deploy file saves the merged entries to config.json
+    Config(
+        config_file=tmp_path / "config.json",
+        deploy_config=tmp_path / "deploy.json",
+    )
+    limits = Config(config_file=tmp_path / "config.json").get("limits")
+    assert limits["ratio"] != limits["ratio"]
+    assert (limits["max"], limits["min"]) == (float("inf"), float("-inf"))
+    assert dump_json([None, float("nan")], compact=True) == "[null,NaN]"
+
+
+def test_load_json_fallback():
+    assert load_json('{"a": NaN, "b": -Infinity}')["b"] == float("-inf")
+    with raises(ValueError):
+        load_json("{")
+
+
+def test_iter_json(monkeypatch):
+    value = {"a": [1, {}, [], {"b": [None]}], 1: {True: "é\n"}, "c": ()}
+    for orjson in (codec.orjson, None):
+        monkeypatch.setattr(codec, "orjson", orjson)
+        for compact in (False, True):
+            expected = dump_json(value, compact)
+            assert "".join(iter_json(value, compact)) == expected
@@ -0,0 +1,22 @@
+from pathlib import Path
+from pytest import importorskip
+from click.testing import CliRunner
+from config_manager import Config
+from config_manager.cli import cli
+
+importorskip("msgpack")
+
+CWD = Path(__file__).parent
+DATA_DIRECTORY = CWD / "data"
+
+
+def test_convert_round_trip(tmp_path: Path):
+    source = DATA_DIRECTORY / "config.yaml"
+    binary = tmp_path / "config.msgpack"
+    for args in [(source, binary), (binary, tmp_path / "config.yaml")]:
+        result = CliRunner().invoke(cli, ["convert", *map(str, args)])
+        assert result.exit_code == 0, result.output
+    entries = Config(config_file=source).entries
+    assert Config(config_file=binary).entries == entries
+    assert Config(config_file=tmp_path / "config.yaml").entries == entries
+    assert Config(config_file=binary).get_int("test_group/int") == 123
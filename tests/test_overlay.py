@@ -0,0 +1,190 @@
+import json
+from pathlib import Path
+from click.testing import CliRunner
+from pytest import raises
+from config_manager import Config
+from config_manager.cli import cli
+from config_manager.tools.overlay import Overlay
+
+LAYERS = {
+    "default_config": {
+        "db": {"host": "localhost", "port": 5432, "options": {"ssl": False}},
+        "hosts": ["a", "b"],
+        "flag": {"nested": 1},
+    },
+    "config_file": {"db": {"host": "db.internal"}, "flag": True},
+    "deploy_config": {"db": {"options": {"ssl": True}}},
+}
+
+
+def test_overlay_matches_merge():
+    overlay = Overlay(LAYERS)
+    assert overlay.find(["db"]) == {
+        "host": "db.internal",
+        "port": 5432,
+        "options": {"ssl": True},
+    }
+    assert overlay.find(["db", "host"]) == "db.internal"
+    assert overlay.find(["hosts", "1"]) == "b"
+    assert overlay.find(["flag"]) is True
+    with raises(KeyError):
+        overlay.find(["flag", "nested"])
+    with raises(KeyError):
+        overlay.find(["db", "missing"])
+    assert overlay.source_of(["db", "port"]) == "default_config"
+    assert overlay.source_of(["db", "host"]) == "config_file"
+    assert overlay.source_of(["db", "options", "ssl"]) == "deploy_config"
+    # The lowest layer is never indexed
+    assert ("db", "port") not in overlay.index
+
+
+def test_overridden_list_hides_lower_dicts(tmp_path: Path):
+    (tmp_path / "default.json").write_text(
+        '{"servers": [{"host": "a", "tls": {"cert": "x"}}]}'
+    )
+    (tmp_path / "config.json").write_text('{"servers": [{"host": "b"}]}')
+    config = Config(
+        config_file=tmp_path / "config.json",
+        default_config=tmp_path / "default.json",
+    )
+    assert config.get("servers/0") == {"host": "b"}
+    assert config.get("servers") == [{"host": "b"}]
+    with raises(KeyError):
+        config.get("servers/0/tls")
+
+
+def test_overlay_set_copies_path():
+    overlay = Overlay(LAYERS)
+    updated = overlay.set("config_file", ["db", "options", "timeout"], 5)
+    assert updated.find(["db", "options"]) == {"ssl": True, "timeout": 5}
+    assert updated.source_of(["db", "options", "timeout"]) == "config_file"
+    assert "options" not in LAYERS["config_file"]["db"]
+    updated = overlay.set("config_file", ["hosts", "0"], "c")
+    assert updated.find(["hosts"]) == ["c", "b"]
+    assert LAYERS["default_config"]["hosts"] == ["a", "b"]
+    with raises(KeyError):
+        overlay.set("config_file", ["missing", "key"], 1)
+
+
+def test_source_of(tmp_path: Path):
+    (tmp_path / "default.json").write_text('{"a": {"b": 1, "c": 2, "d": 3}}')
+    (tmp_path / "config.json").write_text('{"a": {"c": 20}}')
+    (tmp_path / "deploy.json").write_text('{"a": {"d": 30}}')
+    config = Config(
+        config_file=tmp_path / "config.json",
+        default_config=tmp_path / "default.json",
+        deploy_config=tmp_path / "deploy.json",
+    )
+    assert config.get("a") == {"b": 1, "c": 20, "d": 30}
+    assert config.source_of("a/b") == "default_config"
+    assert config.source_of("a/c") == "config_file"
+    assert config.source_of("a/d") == "deploy_config"
+    config.set("a/b", 10)
+    config.set("a/d", 40)
+    assert config.source_of("a/b") == "overrides"
+    assert config.get("a/b") == 10
+    assert config.get("a/d") == 40
+
+
+def test_set_with_deploy(tmp_path: Path):
+    (tmp_path / "config.json").write_text('{"g": {"a": "main", "b": 1}}')
+    (tmp_path / "deploy.json").write_text('{"g": {"a": "deploy"}}')
+    config = Config(
+        config_file=tmp_path / "config.json",
+        deploy_config=tmp_path / "deploy.json",
+    )
+    config.set("g/a", "new")
+    assert config.get("g/a") == "new"
+    assert config.save()
+    saved = json.loads((tmp_path / "config.json").read_text())
+    assert saved == {"g": {"a": "new", "b": 1}}
+    result = CliRunner().invoke(
+        cli,
+        [
+            "set",
+            "-c",
+            str(tmp_path / "config.json"),
+            "--deploy-config",
+            str(tmp_path / "deploy.json"),
+            "g/b",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    saved = json.loads((tmp_path / "config.json").read_text())
+    assert saved["g"]["b"] == "2"
+
+
+def test_entries_changed_in_place(tmp_path: Path):
+    (tmp_path / "config.json").write_text('{"g": {"a": 1}}')
+    config = Config(config_file=tmp_path / "config.json", flat_index=True)
+    entries = config.entries
+    entries["g"]["a"] = 2
+    entries["h"] = {"x": 1}
+    assert config.get("g/a") == 2
+    config.set("h/y", 3)
+    config.set("g", {"b": 4})
+    assert config.entries is entries
+    assert entries == {"g": {"a": 2, "b": 4}, "h": {"x": 1, "y": 3}}
+    assert config.get("h") == {"x": 1, "y": 3}
+    config.save()
+    assert Config(config_file=tmp_path / "config.json").entries == entries
+
+
+def test_flat_index():
+    overlay = Overlay(LAYERS)
+    overlay.flatten()
+    assert overlay.flat[("db", "options", "ssl")] is True
+    assert overlay.flat[("hosts", "1")] == "b"
+    assert ("db",) not in overlay.flat
+    assert overlay.find(("db", "port")) == 5432
+    updated = overlay.set("config_file", ["db", "options"], {"timeout": 5})
+    assert updated.flat[("db", "options", "timeout")] == 5
+    # The deploy layer still provides db/options/ssl
+    assert updated.flat[("db", "options", "ssl")] is True
+    updated = updated.set("config_file", ["hosts", "0"], "c")
+    assert updated.flat[("hosts",)] == ["c", "b"]
+    assert updated.flat[("hosts", "0")] == "c"
+    updated = updated.set("config_file", ["flag"], {"x": 1})
+    assert ("flag",) not in updated.flat
+    assert updated.flat[("flag", "x")] == 1
+    flattened = Overlay(updated.layers)
+    flattened.flatten()
+    assert flattened.flat == updated.flat
+    # Both indexes are updated in place rather than copied
+    assert updated.flat is overlay.flat
+    assert updated.index is overlay.index
+    assert updated.index == flattened.index
+
+
+def test_overlay_set_updates_index():
+    overlay = Overlay(LAYERS)
+    for name, path, value in [
+        ("config_file", ["db", "options", "timeout"], 5),
+        ("deploy_config", ["db"], {"port": 1}),
+        ("config_file", ["hosts", "1"], "c"),
+        ("config_file", ["flag"], {"x": {"y": 1}}),
+        ("default_config", ["db", "user"], "app"),
+        ("config_file", ["new", "path"], []),
+    ]:
+        previous = overlay
+        try:
+            before = overlay.find(path)
+        except KeyError:
+            before = None
+        overlay = overlay.set(name, path, value, create_path=True)
+        assert overlay.index == Overlay(overlay.layers).index
+        # Lookups still running on the previous Overlay see either value
+        if before is not None:
+            assert previous.find(path) in (before, overlay.find(path))
+
+
+def test_config_flat_index():
+    config = Config(
+        entries={"a": {"b": {"c": "${var:a/b/d}", "d": 1}}}, flat_index=True
+    )
+    assert config.parse_path("a/b/c") == ["a", "b", "c"]
+    assert config.get("a/b/c") == "1"
+    config.set("a/b/d", 2)
+    assert config.overlay.flat[("a", "b", "d")] == 2
+    assert config.get("a/b/c") == "2"
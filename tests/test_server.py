@@ -0,0 +1,118 @@
+from os import O_NONBLOCK, O_WRONLY, close, mkfifo, utime, write
+from os import open as os_open
+from pathlib import Path
+from threading import Thread
+from click.testing import CliRunner
+from pytest import raises
+from config_manager import Config
+from config_manager.cli import cli
+from config_manager.server import ConfigServer, query
+
+
+def test_server(tmp_path: Path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text('{"db": {"host": "db", "url": "${var:db/host}:1"}}')
+    socket_path = tmp_path / "config.sock"
+    server = ConfigServer(
+        socket_path, lambda: Config(config_file=config_file, cache_values=True)
+    )
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert query(socket_path, {"op": "get", "path": "db/url"}) == {
+            "ok": True,
+            "value": "db:1",
+        }
+        with raises(RuntimeError):
+            query(socket_path, {"op": "get", "path": "db/missing"})
+        config_file.write_text('{"db": {"host": "new", "url": "x"}}')
+        utime(config_file, ns=(0, 0))
+        result = CliRunner().invoke(
+            cli, ["get", "--socket", str(socket_path), "db/host", "db/url"]
+        )
+        assert result.exit_code == 0, result.output
+        assert result.stdout == "new\nx\n"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+    assert not socket_path.exists()
+
+
+def test_server_permissions(tmp_path: Path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text('{"a": "b"}')
+    with raises(FileExistsError):
+        ConfigServer(config_file, lambda: Config(config_file=config_file))
+    assert config_file.read_text() == '{"a": "b"}'
+    (tmp_path / "root").mkdir()
+    (tmp_path / "root" / "in.tmpl").write_text("${var:a}")
+    (tmp_path / "out.tmpl").write_text("${var:a}")
+    socket_path = tmp_path / "config.sock"
+    server = ConfigServer(
+        socket_path,
+        lambda: Config(config_file=config_file),
+        build_root=tmp_path / "root",
+    )
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert socket_path.stat().st_mode & 0o777 == 0o600
+        root = tmp_path / "root"
+        query(socket_path, {"op": "build", "template": str(root / "in.tmpl")})
+        assert (root / "in.tmpl").read_text() == "b"
+        for request in (
+            {"template": str(tmp_path / "out.tmpl")},
+            {"template": str(root / "in.tmpl"), "output": str(config_file)},
+        ):
+            with raises(RuntimeError, match="PermissionError"):
+                query(socket_path, {"op": "build", **request})
+        assert config_file.read_text() == '{"a": "b"}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_slow_build_does_not_block(tmp_path: Path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text('{"a": "b"}')
+    # Opening a FIFO blocks the build until something writes to it
+    template = tmp_path / "slow.tmpl"
+    mkfifo(template)
+    socket_path = tmp_path / "config.sock"
+    server = ConfigServer(
+        socket_path, lambda: Config(config_file=config_file), tmp_path
+    )
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    build = Thread(
+        target=query,
+        args=(socket_path, {"op": "build", "template": str(template)}),
+    )
+    try:
+        build.start()
+        answers = []
+        get = Thread(
+            target=lambda: answers.append(
+                query(socket_path, {"op": "get", "path": "a"})
+            )
+        )
+        get.start()
+        get.join(5)
+        assert answers == [{"ok": True, "value": "b"}]
+    finally:
+        for _ in range(50):
+            try:
+                fd = os_open(template, O_WRONLY | O_NONBLOCK)
+            except OSError:
+                pass  # Nothing is reading the template right now
+            else:
+                write(fd, b"${var:a}")
+                close(fd)
+            build.join(0.1)
+            if not build.is_alive():
+                break
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -0,0 +1,61 @@
+from os import environ
+from pathlib import Path
+from subprocess import run
+import sys
+
+CWD = Path(__file__).parent
+ROOT = CWD.parent
+DATA_DIRECTORY = CWD / "data"
+
+# Cumulative import time budgets in microseconds. These are deliberately
+# generous so they only trip on a real regression such as an eager import.
+LIBRARY_BUDGET = 50_000
+CLI_BUDGET = 150_000
+HEAVY_MODULES = {"asyncio", "httpx", "yaml", "concurrent.futures", "socket"}
+
+
+def import_times(*args: str) -> dict[str, int]:
+    """
+    Run python -X importtime and return the cumulative import time of every
+    module imported, in microseconds.
+    """
+    result = run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env={**environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    output = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        output[name.strip()] = int(cumulative)
+    return output
+
+
+def test_library_startup():
+    baseline = import_times("-c", "pass")
+    times = import_times(
+        "-c",
+        "from config_manager import Config; "
+        "Config('tests/data/config.json').get('test_group/str')",
+    )
+    assert not (HEAVY_MODULES | {"click"}) & (times.keys() - baseline.keys())
+    assert times["config_manager"] < LIBRARY_BUDGET
+
+
+def test_cli_get_startup():
+    baseline = import_times("-c", "pass")
+    times = import_times(
+        "-m",
+        "config_manager",
+        "get",
+        "-c",
+        str(DATA_DIRECTORY / "config.json"),
+        "test_group/str",
+    )
+    assert not HEAVY_MODULES & (times.keys() - baseline.keys())
+    assert times["config_manager.cli"] < CLI_BUDGET
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from sys import getswitchinterval, setswitchinterval
+from threading import Barrier
+from config_manager import Config
+from config_manager.tools.value_cache import ValueCache
+
+THREADS = 16
+
+
+def run_threads(function, count: int = THREADS) -> list:
+    barrier = Barrier(count)
+
+    def start(index: int):
+        barrier.wait()
+        return function(index)
+
+    # Switch threads as often as possible to make races likely
+    interval = getswitchinterval()
+    setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            return list(executor.map(start, range(count)))
+    finally:
+        setswitchinterval(interval)
+
+
+def test_concurrent_set():
+    config = Config(entries={"counters": {}})
+    run_threads(
+        lambda index: [
+            config.set(f"counters/{index}-{n}", n, create_path=True)
+            for n in range(50)
+        ]
+    )
+    assert len(config.get_dict("counters")) == THREADS * 50
+
+
+def test_reads_during_writes():
+    config = Config(
+        entries={"pair": {"a": 0, "b": 0}, "sum": "${var:pair/a}"},
+        cache_values=True,
+    )
+
+    def work(index: int) -> list:
+        if index == 0:
+            for n in range(1, 200):
+                config.set("pair", {"a": n, "b": n})
+            return []
+        # Each read sees one published overlay, never half of a set
+        pairs = [config.get_dict("pair") for _ in range(200)]
+        return [pair for pair in pairs if pair["a"] != pair["b"]]
+
+    assert run_threads(work) == [[]] * THREADS
+    assert config.get("sum") == "199"
+
+
+def test_lazy_load_once(tmp_path: Path):
+    (tmp_path / "config.json").write_text('{"a": {"b": 1}, "c": 2}')
+    config = Config(config_file=tmp_path / "config.json", lazy=True)
+    results = run_threads(lambda index: config.get_dict("a"))
+    assert results == [{"b": 1}] * THREADS
+    assert config.loaded
+
+
+def test_value_cache_stack_per_thread():
+    cache = ValueCache()
+
+    def resolve(index: int):
+        path = (str(index),)
+        cache.get(path, lambda: cache.get(("shared",), lambda: index))
+        return cache.values[path][1]
+
+    dependencies = run_threads(resolve)
+    for index, paths in enumerate(dependencies):
+        assert paths == {(str(index),), ("shared",)}
+
+
+def test_value_cache_skips_stale_values():
+    cache = ValueCache()
+
+    def resolve():
+        cache.invalidate(("a",))
+        return "stale"
+
+    assert cache.get(("a",), resolve) == "stale"
+    assert ("a",) not in cache
@@ -0,0 +1,70 @@
+from pathlib import Path
+from threading import Event
+from pytest import mark
+from config_manager import Config
+from config_manager import methods
+from config_manager.tools import watcher
+
+
+@mark.parametrize("inotify", [True, False])
+def test_watch(tmp_path: Path, monkeypatch, inotify: bool):
+    if not inotify:
+        monkeypatch.setattr(watcher, "open_inotify", lambda directories: None)
+    (tmp_path / "default.json").write_text('{"a": {"b": 1, "c": 2}}')
+    (tmp_path / "deploy.json").write_text('{"a": {"c": 3}}')
+    config = Config(
+        config_file=tmp_path / "config.json",
+        default_config=tmp_path / "default.json",
+        deploy_config=tmp_path / "deploy.json",
+        cache_values=True,
+    )
+    assert config.get("a/c") == 3
+    parsed = []
+    load_file = methods.load_file
+
+    def counting_load_file(path: Path) -> dict:
+        parsed.append(path)
+        return load_file(path)
+
+    monkeypatch.setattr(methods, "load_file", counting_load_file)
+    changed = Event()
+    config.watch(
+        on_change=lambda files: changed.set(), debounce=0.05, interval=0.1
+    )
+    assert (config.watcher.inotify is not None) == inotify
+    try:
+        # The layers parsed by load are reused
+        assert parsed == []
+        (tmp_path / "deploy.json").write_text("{")
+        (tmp_path / "deploy.json").write_text('{"a": {"c": 4}}')
+        assert changed.wait(5)
+        assert set(parsed) == {tmp_path / "deploy.json"}
+        assert config.get("a/c") == 4
+        assert config.get("a/b") == 1
+    finally:
+        config.stop_watching()
+    assert config.watcher is None
+
+
+def test_watch_after_load(tmp_path: Path):
+    (tmp_path / "config.json").write_text('{"a": 1}')
+    config = Config(config_file=tmp_path / "config.json", cache_values=True)
+    assert config.get("a") == 1
+    # Changed after loading but before watching
+    (tmp_path / "config.json").write_text('{"a": 22}')
+    changed = Event()
+    config.watch(
+        on_change=lambda files: changed.set(), debounce=0.05, interval=0.1
+    )
+    try:
+        assert changed.wait(5)
+        assert config.get("a") == 22
+    finally:
+        config.stop_watching()
+
+
+def test_entries_setter_clears_cache():
+    config = Config(entries={"a": 1, "b": "${var:a}"}, cache_values=True)
+    assert config.get("b") == "1"
+    config.entries = {"a": 2, "b": "${var:a}"}
+    assert config.get("b") == "2"
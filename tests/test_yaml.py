@@ -1,6 +1,8 @@
 from pathlib import Path
 from config_manager import Config
+from config_manager.storage import yaml as yaml_storage
 from pytest import raises
+from yaml import SafeLoader, YAMLError
 
 CWD = Path(__file__).parent
 DATA_DIRECTORY = CWD / "data"
@@ -90,3 +92,18 @@ def test_get_list():
         config.get_list(["_", "_"])
     with raises(KeyError):
         config.get_list(["test_group", "_"])
+
+
+def test_multiple_documents(tmp_path: Path):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\n---\nb: 2\n")
+    with raises(YAMLError):
+        yaml_storage.load(path)
+
+
+def test_pure_python(monkeypatch):
+    path = DATA_DIRECTORY / "config.yaml"
+    entries = yaml_storage.load(path)
+    monkeypatch.setattr(yaml_storage, "pure_python", True)
+    assert yaml_storage.get_loader() is SafeLoader
+    assert yaml_storage.load(path) == entries